@@ -0,0 +1,352 @@
+"""Benchmarks for the DE-CRYPT cipher and MIDI hot paths.
+
+Generates synthetic texts, cypher maps and MIDI files, times each stage and
+reports throughput and peak memory, plus the start-up time of the package
+and its one-shot commands. Results can be written as JSON so runs from
+different releases can be compared:
+
+    python benchmark.py --sizes 100000,1000000 --alphabets 26,64,256 --json bench.json
+
+vigenere_parallel reports how the parallel cypher scales from 1 to N worker
+processes on one large text:
+
+    python benchmark.py --only vigenere_parallel --workers 1,2,4,8,16,32,64
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import de_crypt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_alphabet(size, symbol_length=1):
+    """Upper-case letters and digits first, then non-ASCII symbols for larger sizes.
+
+    With symbol_length > 1 each symbol is a character followed by combining
+    acute accents, giving a list of multi-codepoint symbols.
+    """
+    base = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    if size <= len(base):
+        alphabet = base[:size]
+    else:
+        alphabet = base + ''.join(chr(0x100 + i) for i in range(size - len(base)))
+    if symbol_length > 1:
+        return [char + "\u0301" * (symbol_length - 1) for char in alphabet]
+    return alphabet
+
+
+def make_text(alphabet, size, seed):
+    """Random text of size symbols from alphabet with some spaces and punctuation mixed in."""
+    rng = random.Random(seed)
+    return ''.join(rng.choices([*alphabet, " ", ".", ","], k=size))
+
+
+class Fixture:
+    """Handlers wired to a temporary cypher map for one alphabet size."""
+
+    def __init__(self, module, workdir, alphabet, keyword):
+        self.workdir = workdir
+        # Keyword characters must exist in the alphabet for the cipher to accept them
+        if keyword:
+            keyword = ''.join(char for char in keyword if char in alphabet) or ''.join(alphabet[:3])
+        cypher_file = os.path.join(workdir, f"cypher_{len(alphabet)}.txt")
+        with open(cypher_file, 'w', encoding='utf-8') as file:
+            for i, char in enumerate(alphabet):
+                file.write(f"{char}: {i % 128}\n")
+        keyword_file = os.path.join(workdir, "keyword.txt")
+        with open(keyword_file, 'w') as file:
+            file.write(keyword)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.alphabet_manager = module.AlphabetManager()
+            self.cypher_handler = module.CypherHandler(self.alphabet_manager, cypher_file, 0, keyword_file)
+            self.midi_handler = module.MIDIHandler(self.cypher_handler, self.alphabet_manager)
+            self.vigenere_cipher = module.VigenereCipher(self.alphabet_manager)
+            self.scale = self.cypher_handler.scale
+        self.alphabet = alphabet
+        self.keyword = keyword
+
+
+def measure(func, repeat):
+    """Best wall time over repeat runs, then one traced run for peak memory."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def bench_vigenere_encrypt(fixture, text, notes, midi_file):
+    return lambda: fixture.vigenere_cipher.encrypt(text, fixture.keyword), len(text), "chars/s"
+
+
+def bench_vigenere_decrypt(fixture, text, notes, midi_file):
+    return lambda: fixture.vigenere_cipher.decrypt(text, fixture.keyword), len(text), "chars/s"
+
+
+def bench_text_to_midi_notes(fixture, text, notes, midi_file):
+    return lambda: fixture.midi_handler.text_to_midi_notes(text, fixture.scale), len(text), "chars/s"
+
+
+def bench_create_midi_file(fixture, text, notes, midi_file):
+    base = os.path.join(fixture.workdir, "bench_out")
+
+    def run():
+        fixture.midi_handler.create_midi_file(notes, base)
+        os.remove(base + ".mid")
+    return run, len(notes), "notes/s"
+
+
+def bench_midi_to_text(fixture, text, notes, midi_file):
+    return lambda: fixture.midi_handler.midi_to_text(midi_file, fixture.scale), len(notes), "notes/s"
+
+
+def bench_midi_to_text_mido(fixture, text, notes, midi_file):
+    return lambda: fixture.midi_handler.midi_to_text(midi_file, fixture.scale, native=False), len(notes), "notes/s"
+
+
+def bench_encrypt_text_file(fixture, text, notes, midi_file):
+    source = os.path.join(fixture.workdir, "bench_text.txt")
+    with open(source, 'w') as file:
+        file.write(text)
+    target = os.path.join(fixture.workdir, "bench_out.mid")
+    return (lambda: fixture.midi_handler.encrypt_text_file(source, target, fixture.vigenere_cipher, fixture.keyword),
+            len(text), "chars/s")
+
+
+def bench_decrypt_whole_text(fixture, text, notes, midi_file):
+    """The in-memory decrypt path: parse every note, build the text, decrypt it, write it."""
+    target = os.path.join(fixture.workdir, "bench_out.txt")
+
+    def run():
+        decrypted, _ = fixture.midi_handler.midi_to_text(midi_file, fixture.scale)
+        if fixture.keyword:
+            decrypted = fixture.vigenere_cipher.decrypt(decrypted, fixture.keyword)
+        with open(target, 'w') as file:
+            file.write(decrypted)
+    return run, len(notes), "notes/s"
+
+
+def bench_decrypt_midi_file(fixture, text, notes, midi_file):
+    target = os.path.join(fixture.workdir, "bench_out.txt")
+    return (lambda: fixture.midi_handler.decrypt_midi_file(midi_file, target, fixture.vigenere_cipher, fixture.keyword),
+            len(notes), "notes/s")
+
+
+def bench_create_cypher_from_midi(fixture, text, notes, midi_file):
+    output = os.path.join(fixture.workdir, "bench_cypher.txt")
+    return lambda: fixture.midi_handler.create_cypher_from_midi(midi_file, output), len(notes), "notes/s"
+
+
+BENCHMARKS = {
+    "vigenere_encrypt": bench_vigenere_encrypt,
+    "vigenere_decrypt": bench_vigenere_decrypt,
+    "text_to_midi_notes": bench_text_to_midi_notes,
+    "create_midi_file": bench_create_midi_file,
+    "midi_to_text": bench_midi_to_text,
+    "midi_to_text_mido": bench_midi_to_text_mido,
+    "create_cypher_from_midi": bench_create_cypher_from_midi,
+    "encrypt_text_file": bench_encrypt_text_file,
+    "decrypt_whole_text": bench_decrypt_whole_text,
+    "decrypt_midi_file": bench_decrypt_midi_file,
+}
+
+# Fresh interpreter runs, timed from process start to exit
+STARTUP_BENCHMARKS = {
+    "startup_python": lambda workdir: ["-c", "pass"],
+    "startup_import": lambda workdir: ["-c", "import de_crypt"],
+    "startup_encode": lambda workdir: [
+        "-m", "de_crypt", "encode", "HELLO WORLD", "-k", "KEY",
+        "-c", os.path.join(HERE, "default_cypher.txt"), "-o", os.path.join(workdir, "startup.mid"),
+    ],
+    "startup_decode": lambda workdir: [
+        "-m", "de_crypt", "decode", os.path.join(workdir, "startup.mid"), "-k", "KEY",
+        "-c", os.path.join(HERE, "default_cypher.txt"), "-o", os.devnull,
+    ],
+}
+
+# Benchmarks whose cost does not depend on the keyword
+KEYWORD_INDEPENDENT = {"text_to_midi_notes", "create_midi_file", "midi_to_text", "midi_to_text_mido",
+                       "create_cypher_from_midi"}
+
+
+def measure_startup(args, repeat):
+    """Best wall time over repeat runs of a fresh interpreter with args."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [HERE, os.environ.get("PYTHONPATH")])))
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_startup_benchmarks(names, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # startup_decode reads the file startup_encode writes
+        measure_startup(STARTUP_BENCHMARKS["startup_encode"](workdir), 1)
+        for name in names:
+            seconds = measure_startup(STARTUP_BENCHMARKS[name](workdir), repeat)
+            results.append({"benchmark": name, "seconds": seconds, "unit": "s"})
+            print(f"{name:<24} {seconds * 1000:10.1f} ms")
+    return results
+
+
+def default_worker_counts():
+    """1, 2, 4, ... up to and including the CPU count."""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+    return counts + [cpus] if cpus > 1 else counts
+
+
+def run_parallel_benchmarks(size, alphabet_sizes, keyword, worker_counts, repeat, seed):
+    """Scaling of ParallelVigenere encryption with the number of worker processes.
+
+    One worker is the plain in-process cypher, the baseline for the speedups.
+    Each pool is started by an untimed run first, as a long-running command
+    would reuse it.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for alphabet_size in alphabet_sizes:
+            alphabet = make_alphabet(alphabet_size)
+            fixture = Fixture(de_crypt, workdir, alphabet, keyword or "SECRETKEY")
+            table = fixture.vigenere_cipher.get_table()
+            text = make_text(alphabet, size, seed).upper().replace(" ", "")
+            key = fixture.keyword.upper()
+            baseline = None
+            for workers in worker_counts:
+                with de_crypt.ParallelVigenere(workers, min_size=0) as parallel:
+                    parallel.transform(table, text, key)
+                    seconds, peak = measure(lambda: parallel.transform(table, text, key), repeat)
+                baseline = baseline or seconds
+                result = {
+                    "benchmark": "vigenere_parallel",
+                    "alphabet_size": alphabet_size,
+                    "workers": workers,
+                    "size": len(text),
+                    "units": len(text),
+                    "seconds": seconds,
+                    "throughput": len(text) / seconds if seconds else None,
+                    "unit": "chars/s",
+                    "speedup": baseline / seconds if seconds else None,
+                    "peak_memory_bytes": peak,
+                }
+                results.append(result)
+                print(f"vigenere_parallel        alphabet={alphabet_size:<4} workers={workers:<4} "
+                      f"size={len(text):<9} {result['throughput']:>14,.0f} chars/s  "
+                      f"speedup={result['speedup']:5.2f}x")
+    return results
+
+
+def run_benchmarks(sizes, alphabet_sizes, keywords, names, repeat, seed, symbol_length=1):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for alphabet_size in alphabet_sizes:
+            alphabet = make_alphabet(alphabet_size, symbol_length)
+            for keyword in keywords:
+                fixture = Fixture(de_crypt, workdir, alphabet, keyword or "")
+                for size in sizes:
+                    text = make_text(alphabet, size, seed)
+                    notes = fixture.midi_handler.text_to_midi_notes(text, fixture.scale)
+                    midi_base = os.path.join(workdir, "bench_in")
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        fixture.midi_handler.create_midi_file(notes, midi_base)
+                    midi_file = midi_base + ".mid"
+                    for name in names:
+                        if keyword != keywords[0] and name in KEYWORD_INDEPENDENT:
+                            continue
+                        func, units, unit = BENCHMARKS[name](fixture, text, notes, midi_file)
+                        seconds, peak = measure(func, repeat)
+                        result = {
+                            "benchmark": name,
+                            "alphabet_size": alphabet_size,
+                            "symbol_length": symbol_length,
+                            "keyword": bool(keyword) if name not in KEYWORD_INDEPENDENT else None,
+                            "size": size,
+                            "units": units,
+                            "seconds": seconds,
+                            "throughput": units / seconds if seconds else None,
+                            "unit": unit,
+                            "peak_memory_bytes": peak,
+                        }
+                        results.append(result)
+                        print(f"{name:<24} alphabet={alphabet_size:<4} keyword={str(result['keyword']):<5} "
+                              f"size={size:<9} {result['throughput']:>14,.0f} {unit:<8} "
+                              f"peak={peak / 1e6:8.2f} MB")
+                    os.remove(midi_file)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DE-CRYPT cipher and MIDI hot paths.")
+    parser.add_argument("--sizes", default="100000", help="Comma-separated text sizes in characters.")
+    parser.add_argument("--alphabets", default="26,64,256", help="Comma-separated alphabet sizes.")
+    parser.add_argument("--symbol-length", type=int, default=1,
+                        help="Code points per alphabet symbol; above 1 exercises the multi-character symbol paths.")
+    parser.add_argument("--keyword", default="SECRETKEY", help="Keyword for the keyword runs.")
+    parser.add_argument("--no-keyword", action="store_true", help="Also run without a keyword.")
+    parser.add_argument("--workers", default=None,
+                        help="Comma-separated worker counts for vigenere_parallel (default: 1, 2, 4, ... CPU count).")
+    parser.add_argument("--parallel-size", type=int, default=4_000_000,
+                        help="Text size in characters for vigenere_parallel.")
+    parser.add_argument("--only", default=",".join([*BENCHMARKS, "vigenere_parallel", *STARTUP_BENCHMARKS]),
+                        help="Comma-separated benchmark names.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.only.split(",") if name]
+    unknown = set(names) - set(BENCHMARKS) - set(STARTUP_BENCHMARKS) - {"vigenere_parallel"}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    alphabet_sizes = [int(size) for size in args.alphabets.split(",")]
+    keywords = [args.keyword] + ([""] if args.no_keyword else [])
+
+    results = run_benchmarks(sizes, alphabet_sizes, keywords, [name for name in names if name in BENCHMARKS],
+                             args.repeat, args.seed, args.symbol_length)
+    if "vigenere_parallel" in names:
+        worker_counts = [int(count) for count in args.workers.split(",")] if args.workers else default_worker_counts()
+        results += run_parallel_benchmarks(args.parallel_size, alphabet_sizes, args.keyword, worker_counts,
+                                           args.repeat, args.seed)
+    results += run_startup_benchmarks([name for name in names if name in STARTUP_BENCHMARKS], max(args.repeat, 5))
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.time(),
+            "results": results,
+        }
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to '{args.json}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""DE-CRYPT: convert text to MIDI notes and back with cypher maps and a Vigenere keyword.
+
+Names are exported from their submodules on first access, so importing the
+package, or starting a one-shot command, doesn't load mido, numpy, asyncio or
+the process pool until something needs them.
+"""
+import importlib
+
+__version__ = "4.7"
+
+_EXPORTS = {
+    "Instrumentation": "instrumentation",
+    "INSTRUMENTATION": "instrumentation",
+    "Alphabet": "cypher",
+    "AlphabetManager": "cypher",
+    "CypherMap": "cypher",
+    "CachedCypher": "cypher",
+    "CypherCache": "cypher",
+    "CYPHER_CACHE": "cypher",
+    "CypherHandler": "cypher",
+    "ROOT_NOTES": "cypher",
+    "generate_root_notes": "cypher",
+    "parse_root_note": "cypher",
+    "MIDIEncoder": "midi",
+    "MIDIStreamWriter": "midi",
+    "MIDIParseError": "midi",
+    "SMFNoteReader": "midi",
+    "MIDIHandler": "midi",
+    "midi_note_histogram": "midi",
+    "VigenereTable": "vigenere",
+    "VigenereCipher": "vigenere",
+    "ParallelVigenere": "vigenere",
+    "ByteCipher": "vigenere",
+    "VigenereAnalyzer": "analysis",
+    "Utils": "utils",
+    "MessageGenerator": "batch",
+    "run_batch": "batch",
+    "run_generate": "batch",
+    "EncryptJob": "jobs",
+    "CypherService": "service",
+    "CypherServer": "service",
+    "service_request": "service",
+    "run": "cli",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
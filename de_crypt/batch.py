@@ -0,0 +1,315 @@
+"""Parallel batch encryption, decryption, generation and cypher derivation."""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .cypher import AlphabetManager, CypherHandler
+from .instrumentation import INSTRUMENTATION, Instrumentation
+from .midi import MIDIHandler
+from .options import add_cypher_arguments, add_midi_arguments, handler_options
+from .utils import Utils, collect_batch_inputs
+from .vigenere import VigenereCipher
+
+_batch_handlers = None
+
+def _init_batch_worker(options):
+    """Build the handlers once per batch worker process."""
+    global _batch_handlers
+    INSTRUMENTATION.console = False
+    INSTRUMENTATION.enabled = options.get("stages", False)
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, options["cypher"], options["root_note"], options["keyword_file"])
+    if options["keyword"] is not None:
+        cypher_handler.keyword = options["keyword"].upper()
+    midi_handler = MIDIHandler(
+        cypher_handler, alphabet_manager, options["note_on_time"], options["note_off_time"],
+        options["chord_size"], options["tracks"], options.get("unknown", "skip"), options.get("replacement")
+    )
+    vigenere_cipher = VigenereCipher(alphabet_manager)
+    _batch_handlers = (cypher_handler, midi_handler, vigenere_cipher, options["chunk_size"])
+
+def _cypher_loads(options):
+    """True if the cypher in options has symbols; otherwise report it, before any worker starts."""
+    if CypherHandler(AlphabetManager(), options["cypher"], options["root_note"]).scale:
+        return True
+    print(f"Error: no cypher could be loaded from '{options['cypher']}'.")
+    return False
+
+def _run_batch_job(job):
+    """Encrypt or decrypt one file in a batch worker and time it."""
+    mode, source, target = job
+    cypher_handler, midi_handler, vigenere_cipher, chunk_size = _batch_handlers
+    keyword = cypher_handler.get_keyword()
+    INSTRUMENTATION.reset()
+    start = time.perf_counter()
+    try:
+        if not cypher_handler.scale:
+            raise ValueError(f"no cypher could be loaded from '{cypher_handler.filename}'.")
+        if mode == "encrypt":
+            count = midi_handler.encrypt_text_file(source, target, vigenere_cipher, keyword, chunk_size)
+        else:
+            count = midi_handler.decrypt_midi_file(source, target, vigenere_cipher, keyword, chunk_size)
+        error = None
+    except Exception as e:
+        count, error = 0, f"{type(e).__name__}: {e}"
+    return {
+        "source": source,
+        "target": target,
+        "seconds": time.perf_counter() - start,
+        "bytes": os.path.getsize(source) if os.path.exists(source) else 0,
+        "notes": count,
+        "error": error,
+        "stages": INSTRUMENTATION.report() if INSTRUMENTATION.enabled else None,
+    }
+
+def plan_batch_outputs(inputs, output_dir, extension):
+    """Name each output after its input, numbering repeated names in input order.
+
+    Names depend only on the input list, so no existence checks are needed.
+    """
+    seen = {}
+    outputs = []
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = seen.get(stem, 0)
+        seen[stem] = count + 1
+        name = f"{stem}{extension}" if count == 0 else f"{stem}_{count}{extension}"
+        outputs.append(os.path.join(output_dir, name))
+    return outputs
+
+def run_batch(mode, patterns, output_dir, options, workers=None):
+    """Encrypt text files or decrypt MIDI files over a process pool and report timings."""
+    inputs = collect_batch_inputs(patterns, mode)
+    if not inputs:
+        print("No input files found.")
+        return []
+    if not _cypher_loads(options):
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = plan_batch_outputs(inputs, output_dir, ".mid" if mode == "encrypt" else ".txt")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(inputs)))
+
+    jobs = [(mode, src, dst) for src, dst in zip(inputs, outputs)]
+    profile = options.get("profile")
+
+    start = time.perf_counter()
+    if profile:
+        # Profile in this process so cProfile sees every stage
+        workers = 1
+        console, enabled = INSTRUMENTATION.console, INSTRUMENTATION.enabled
+        _init_batch_worker(options)
+        try:
+            with INSTRUMENTATION.capture():
+                results = [_run_batch_job(job) for job in jobs]
+        finally:
+            INSTRUMENTATION.console, INSTRUMENTATION.enabled = console, enabled
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(options,)) as executor:
+            results = list(executor.map(_run_batch_job, jobs))
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result["error"]:
+            print(f"FAILED {result['source']}: {result['error']}")
+        else:
+            print(f"{result['source']} -> {result['target']}: {result['notes']} notes, "
+                  f"{result['bytes']} bytes in {result['seconds']:.3f}s")
+    total_bytes = sum(result["bytes"] for result in results if not result["error"])
+    total_notes = sum(result["notes"] for result in results)
+    failed = sum(1 for result in results if result["error"])
+    print(f"\n{len(results) - failed}/{len(results)} files {mode}ed with {workers} workers in {elapsed:.3f}s")
+    if elapsed > 0:
+        print(f"Throughput: {total_bytes / elapsed / 1e6:.2f} MB/s, {total_notes / elapsed:.0f} notes/s, "
+              f"{len(results) / elapsed:.1f} files/s")
+    if options.get("stages"):
+        stages = Instrumentation()
+        for result in results:
+            if result["stages"]:
+                stages.merge(result["stages"])
+        print("\nStages:")
+        stages.print_report()
+    if profile:
+        INSTRUMENTATION.profile.dump_stats(profile)
+        print(f"\nProfile written to '{profile}', peak traced memory {INSTRUMENTATION.peak_memory / 1e6:.2f} MB")
+        INSTRUMENTATION.profile.sort_stats("cumulative").print_stats(15)
+    return results
+
+class MessageGenerator:
+    """Build random or message-embedding padded strings and their MIDI notes.
+
+    Each string gets its own generator seeded from (seed, index), so output
+    for a given seed does not depend on the order or process in which strings
+    are made. With secure=True strings come from the system's secure random
+    source instead and are not reproducible.
+    """
+
+    def __init__(self, cypher_handler, midi_handler, vigenere_cipher):
+        self.cypher_handler = cypher_handler
+        self.midi_handler = midi_handler
+        self.vigenere_cipher = vigenere_cipher
+        self.valid_chars = list(cypher_handler.scale.keys())
+
+    @staticmethod
+    def rng_for(seed, index, secure=False):
+        if secure:
+            return random.SystemRandom()
+        if seed is None:
+            return random.Random()
+        return random.Random(f"{seed}:{index}")
+
+    def make_string(self, rng, length, message=None):
+        """A random string of length characters, with message centred in it if given."""
+        if message is None:
+            return Utils.generate_random_string(length, self.valid_chars, rng)
+        if len(message) > length:
+            raise ValueError("The message is longer than the total string length.")
+        padding_length = length - len(message)
+        left_padding = padding_length // 2
+        return (Utils.generate_random_string(left_padding, self.valid_chars, rng) + message
+                + Utils.generate_random_string(padding_length - left_padding, self.valid_chars, rng))
+
+    def make_notes(self, text):
+        """Apply the keyword, if any, and map text to MIDI notes."""
+        keyword = self.cypher_handler.get_keyword()
+        if keyword:
+            text = self.vigenere_cipher.encrypt(text, keyword)
+        return self.midi_handler.text_to_midi_notes(text, self.cypher_handler.scale)
+
+    def generate(self, count, length, message=None, seed=None, secure=False, start=0):
+        """Yield (string, notes) for count strings."""
+        for index in range(start, start + count):
+            text = self.make_string(self.rng_for(seed, index, secure), length, message)
+            yield text, self.make_notes(text)
+
+def _run_generate_job(job):
+    """Generate and write one MIDI file in a batch worker."""
+    index, length, message, seed, secure, target = job
+    cypher_handler, midi_handler, vigenere_cipher, _ = _batch_handlers
+    generator = MessageGenerator(cypher_handler, midi_handler, vigenere_cipher)
+    (text, notes), = generator.generate(1, length, message, seed, secure, start=index)
+    midi_handler.write_midi_file(notes, target)
+    return len(notes)
+
+def run_generate(count, length, output_dir, options, message=None, seed=None, secure=False, workers=None,
+                 filename_base="generated"):
+    """Write count generated MIDI files named filename_base_NNNNNN.mid over a process pool.
+
+    Returns the total number of notes written, or None if the cypher could not be loaded.
+    """
+    if not _cypher_loads(options):
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    digits = max(6, len(str(count - 1)))
+    jobs = [
+        (index, length, message, seed, secure, os.path.join(output_dir, f"{filename_base}_{index:0{digits}d}.mid"))
+        for index in range(count)
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, count))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(options,)) as executor:
+        total_notes = sum(executor.map(_run_generate_job, jobs, chunksize=max(1, min(256, count // (workers * 4)))))
+    elapsed = time.perf_counter() - start
+    print(f"{count} MIDI files generated in '{output_dir}' with {workers} workers in {elapsed:.3f}s")
+    if elapsed > 0:
+        print(f"Throughput: {count / elapsed:.1f} files/s, {total_notes / elapsed:.0f} notes/s")
+    return total_notes
+
+def _add_batch_arguments(parser):
+    """Options shared by the batch encrypt, decrypt and generate commands."""
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for output files.")
+    add_cypher_arguments(parser)
+    add_midi_arguments(parser)
+    parser.add_argument("--chunk-size", type=int, default=Utils.CHUNK_SIZE)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+
+def _batch_options(parser, args):
+    options = handler_options(parser, args)
+    options["chunk_size"] = args.chunk_size
+    return options
+
+def generate_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py generate COUNT LENGTH [options]``."""
+    parser = argparse.ArgumentParser(prog="DE-CRYPT_4.7.py generate",
+                                     description="Generate many random or message-embedding MIDI files.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("length", type=int, help="Characters per generated string.")
+    parser.add_argument("-m", "--message", default=None, help="Message to embed in the middle of each string.")
+    parser.add_argument("-s", "--seed", default=None, help="Seed for reproducible output.")
+    parser.add_argument("--secure", action="store_true", help="Use the system's secure random source.")
+    parser.add_argument("--name", default="generated", help="Base name of the output files.")
+    _add_batch_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.count < 1 or args.length < 0:
+        parser.error("count must be at least 1 and length non-negative")
+    if args.message is not None and len(args.message) > args.length:
+        parser.error("the message is longer than the total string length")
+    if args.secure and args.seed is not None:
+        parser.error("--secure output cannot be seeded")
+    options = _batch_options(parser, args)
+    total_notes = run_generate(args.count, args.length, args.output_dir, options, args.message, args.seed,
+                               args.secure, args.workers, args.name)
+    return 1 if total_notes is None else 0
+
+def batch_main(argv):
+    """Non-interactive entry point: ``DE-CRYPT_4.7.py {encrypt,decrypt} PATH... [options]``."""
+    parser = argparse.ArgumentParser(description="Batch encrypt text files to MIDI or decrypt MIDI files to text.")
+    parser.add_argument("mode", choices=["encrypt", "decrypt"])
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns.")
+    _add_batch_arguments(parser)
+    parser.add_argument("--stages", action="store_true", help="Report time spent in each pipeline stage.")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="Run in-process under cProfile/tracemalloc and write the stats to FILE.")
+    args = parser.parse_args(argv)
+    options = _batch_options(parser, args)
+    options["stages"] = args.stages
+    options["profile"] = args.profile
+    results = run_batch(args.mode, args.inputs, args.output_dir, options, args.workers)
+    return 1 if not results or any(result["error"] for result in results) else 0
+
+def derive_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py derive MIDI_PATH... -o CYPHER_FILE [options]``."""
+    parser = argparse.ArgumentParser(prog="DE-CRYPT_4.7.py derive",
+                                     description="Derive a cypher map for the symbols of a cypher from the notes "
+                                                 "of many MIDI files.")
+    parser.add_argument("inputs", nargs="+", help="MIDI files, directories or glob patterns.")
+    parser.add_argument("-o", "--output", default="derived_cypher.txt", help="Cypher file to write.")
+    add_cypher_arguments(parser, keyword=False)
+    parser.add_argument("--mode", choices=["sorted", "frequency"], default="sorted",
+                        help="Assign symbols to notes in pitch order or by how often each occurs.")
+    parser.add_argument("--reference", help="Sample plaintext to rank symbols by (frequency mode).")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args(argv)
+    options = handler_options(parser, args)
+
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, options["cypher"], options["root_note"])
+    if not cypher_handler.scale:
+        return 1
+    symbols = alphabet_manager.get_symbols()
+    reference = Utils.read_text_from_file(args.reference) if args.reference else None
+    start = time.perf_counter()
+    try:
+        histogram, errors = MIDIHandler.note_histogram(args.inputs, args.workers)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    for filename, error in errors:
+        print(f"FAILED {filename}: {error}")
+    try:
+        cypher_map = MIDIHandler.derive_cypher_map(histogram, symbols, args.mode, reference)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    with open(args.output, 'w', encoding='utf-8') as file:
+        for char, note in cypher_map.items():
+            file.write(f"{char}: {note}\n")
+    distinct = sum(1 for count in histogram if count)
+    print(f"{sum(histogram)} notes ({distinct} distinct) counted in {elapsed:.3f}s")
+    if distinct < len(symbols.index):
+        print(f"Warning: only {distinct} distinct notes for {len(symbols.index)} symbols; "
+              f"{len(symbols.index) - distinct} symbols are unmapped.")
+    print(f"Cypher created and saved to '{args.output}'.")
+    return 0
@@ -0,0 +1,127 @@
+"""Command line entry point.
+
+Each command imports its own module when it runs, so the one-shot encode and
+decode commands start without loading the batch, service or analysis code.
+"""
+import argparse
+import io
+import sys
+
+from .cypher import AlphabetManager, CypherHandler
+from .instrumentation import INSTRUMENTATION
+from .midi import MIDIHandler, MIDIParseError, SMFNoteReader, mido_notes
+from .options import add_cypher_arguments, add_midi_arguments, handler_options
+from .vigenere import VigenereCipher
+
+def _one_shot_parser(command, description):
+    parser = argparse.ArgumentParser(prog=f"DE-CRYPT_4.7.py {command}", description=description)
+    add_cypher_arguments(parser)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Processes for the Vigenere cypher on texts of 1M characters or more "
+                             "(default: 1; 0 uses every CPU).")
+    return parser
+
+def _one_shot_handlers(parser, options):
+    """Build the handlers for a one-shot command with status messages turned off."""
+    INSTRUMENTATION.console = False
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, options["cypher"], options["root_note"], options["keyword_file"])
+    if not cypher_handler.scale:
+        parser.exit(1, f"Error: no cypher could be loaded from '{options['cypher']}'.\n")
+    keyword = options["keyword"]
+    keyword = keyword.upper() if keyword is not None else cypher_handler.get_keyword()
+    return alphabet_manager, cypher_handler, keyword
+
+def encode_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py encode TEXT [options]``: encrypt one text to one MIDI file."""
+    parser = _one_shot_parser("encode", "Encrypt a text to a MIDI file, or to standard output.")
+    parser.add_argument("text", help="Text to encrypt, or - to read standard input.")
+    parser.add_argument("-o", "--output", default="-", help="MIDI file to write (default: standard output).")
+    add_midi_arguments(parser)
+    args = parser.parse_args(argv)
+    options = handler_options(parser, args)
+    alphabet_manager, cypher_handler, keyword = _one_shot_handlers(parser, options)
+
+    text = sys.stdin.read() if args.text == "-" else args.text
+    midi_handler = MIDIHandler(cypher_handler, alphabet_manager, options["note_on_time"], options["note_off_time"],
+                               options["chord_size"], options["tracks"], options["unknown"], options["replacement"])
+    vigenere_cipher = VigenereCipher(alphabet_manager, args.workers)
+    try:
+        if keyword:
+            text = vigenere_cipher.encrypt(text, keyword)
+        data = midi_handler.encode_midi(midi_handler.text_to_midi_notes(text, cypher_handler.scale))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        vigenere_cipher.close()
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, 'wb') as file:
+            file.write(data)
+    return 0
+
+def decode_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py decode MIDI_FILE [options]``: decrypt one MIDI file to text."""
+    parser = _one_shot_parser("decode", "Decrypt a MIDI file, or standard input, to text.")
+    parser.add_argument("midi_file", help="MIDI file to decrypt, or - to read standard input.")
+    parser.add_argument("-o", "--output", default="-", help="Text file to write (default: standard output).")
+    args = parser.parse_args(argv)
+    alphabet_manager, cypher_handler, keyword = _one_shot_handlers(parser, handler_options(parser, args))
+
+    vigenere_cipher = VigenereCipher(alphabet_manager, args.workers)
+    try:
+        if args.midi_file == "-":
+            data = sys.stdin.buffer.read()
+        else:
+            with open(args.midi_file, 'rb') as file:
+                data = file.read()
+        try:
+            notes = list(SMFNoteReader.iter_bytes_notes(data))
+        except MIDIParseError:
+            notes = mido_notes(file=io.BytesIO(data))
+        text = cypher_handler.get_cypher_map().decode(notes)
+        if keyword:
+            text = vigenere_cipher.decrypt(text, keyword)
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        vigenere_cipher.close()
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(text)
+    return 0
+
+def run(argv=None):
+    """Run the command named by argv[0], or the interactive menu when there are no arguments."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        from .menu import main
+        return main()
+    command, rest = argv[0], argv[1:]
+    if command == "encode":
+        return encode_main(rest)
+    if command == "decode":
+        return decode_main(rest)
+    if command == "serve":
+        from .service import serve_main
+        return serve_main(rest)
+    if command == "generate":
+        from .batch import generate_main
+        return generate_main(rest)
+    if command == "derive":
+        from .batch import derive_main
+        return derive_main(rest)
+    if command == "job":
+        from .jobs import job_main
+        return job_main(rest)
+    if command == "analyze":
+        from .analysis import analyze_main
+        return analyze_main(rest)
+    from .batch import batch_main
+    return batch_main(argv)
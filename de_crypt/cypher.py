@@ -0,0 +1,554 @@
+"""Alphabets, cypher maps and the handler that loads them from disk."""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from .instrumentation import INSTRUMENTATION
+
+class Alphabet:
+    """An ordered set of symbols with constant-time lookup in both directions.
+
+    Symbols are usually single characters but may be multi-codepoint tokens
+    (digraphs, ligatures, combining sequences, emoji). ``index`` maps each
+    symbol to its first position and ``symbols[i]`` gives it back, so a lookup
+    costs the same for 26 symbols as for 4096. tokenize() splits text into
+    symbols by walking a trie of them and taking the longest match, so with a
+    keyword no run of symbols should also spell a longer one (T, H and TH):
+    the ciphertext would be read back as the longer symbol.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = tuple(symbols)
+        self.text = ''.join(self.symbols)
+        self.index = {}
+        for i, symbol in enumerate(self.symbols):
+            # First occurrence wins, matching str.index on the alphabet
+            self.index.setdefault(symbol, i)
+        self.max_length = max(map(len, self.symbols), default=1)
+        self.simple = self.max_length <= 1
+        self._trie = None
+
+    @classmethod
+    def upper_case(cls, symbols):
+        """The upper-cased alphabet the cipher works in.
+
+        A plain string, or symbols that are all single characters, is
+        upper-cased as one string, so a character like 'ß' becomes two symbols
+        as it always has. Otherwise each symbol is upper-cased on its own.
+        """
+        if not isinstance(symbols, str):
+            symbols = list(symbols)
+            if any(len(symbol) != 1 for symbol in symbols):
+                return cls(symbol.upper() for symbol in symbols if symbol)
+            symbols = ''.join(symbols)
+        return cls(symbols.upper())
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __getitem__(self, position):
+        return self.symbols[position]
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __eq__(self, other):
+        return isinstance(other, Alphabet) and self.symbols == other.symbols
+
+    def __hash__(self):
+        return hash(self.symbols)
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def trie(self):
+        """Nested dicts keyed by character; a node holding the key None ends a symbol."""
+        if self._trie is None:
+            trie = {}
+            for symbol in self.symbols:
+                node = trie
+                for char in symbol:
+                    node = node.setdefault(char, {})
+                node[None] = True
+            self._trie = trie
+        return self._trie
+
+    def tokenize(self, text):
+        """Split text into symbols, longest match first.
+
+        Characters that start no symbol come back on their own, so joining the
+        result always gives text again.
+        """
+        if self.simple:
+            return list(text)
+        trie = self.trie
+        tokens = []
+        append = tokens.append
+        i, length = 0, len(text)
+        while i < length:
+            node = trie.get(text[i])
+            end = i + 1
+            if node is not None:
+                j = end
+                while j < length:
+                    node = node.get(text[j])
+                    if node is None:
+                        break
+                    j += 1
+                    if None in node:
+                        end = j
+            append(text[i:end])
+            i = end
+        return tokens
+
+    def split_complete(self, text):
+        """Split text into a head whose symbols can't change whatever follows it, and the rest."""
+        if self.simple:
+            return text, ''
+        # The trie walk looks at most max_length characters ahead of a symbol's start
+        end = len(text) - self.max_length
+        position = 0
+        for token in self.tokenize(text):
+            if position > end:
+                break
+            position += len(token)
+        return text[:position], text[position:]
+
+    def rechunk(self, chunks):
+        """Re-split an iterable of text chunks so no symbol is cut in two at a chunk boundary."""
+        if self.simple:
+            yield from chunks
+            return
+        rest = ''
+        for chunk in chunks:
+            head, rest = self.split_complete(rest + chunk)
+            if head:
+                yield head
+        if rest:
+            yield rest
+
+class AlphabetManager:
+    def __init__(self, default_alphabet="ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890"):
+        self.alphabet = default_alphabet
+        self.symbols = Alphabet(default_alphabet)
+        self._loader = None
+
+    def defer(self, loader):
+        """Call loader before the alphabet is next read or changed.
+
+        Lets a CypherHandler put off loading its cypher, which sets the
+        alphabet, until something needs it.
+        """
+        self._loader = loader
+
+    def cancel(self, loader):
+        """Drop loader if it is still waiting to be called."""
+        if self._loader is loader:
+            self._loader = None
+
+    def _load(self):
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            loader()
+
+    def set_alphabet(self, new_alphabet):
+        """Update the alphabet dynamically.
+
+        new_alphabet is a string of single-character symbols or a list of
+        symbols, which may be several characters long.
+        """
+        self._load()
+        self.symbols = Alphabet.upper_case(new_alphabet)
+        self.alphabet = self.symbols.text
+        INSTRUMENTATION.emit("alphabet_updated", f"Library updated to: {self.alphabet}", alphabet=self.alphabet)
+
+    def reset_alphabet(self, default_alphabet="ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890"):
+        """Reset the alphabet to its default."""
+        self._load()
+        self.alphabet = default_alphabet
+        self.symbols = Alphabet(default_alphabet)
+        INSTRUMENTATION.emit("alphabet_reset", "Library reset to default.", alphabet=self.alphabet)
+
+    def get_alphabet(self):
+        """Get the current alphabet."""
+        self._load()
+        return self.alphabet
+
+    def get_symbols(self):
+        """Get the current alphabet as an Alphabet of symbols."""
+        self._load()
+        return self.symbols
+
+class _DeletingTable(dict):
+    """str.translate table that drops characters it has no entry for."""
+    def __missing__(self, key):
+        return None
+
+# What CypherMap.encode does with symbols that have no note
+UNKNOWN_POLICIES = ("skip", "error", "replace")
+# Characters left outside Latin-1 by the encode table are symbols with no note
+_UNMAPPED = re.compile('[^\x00-\xff]')
+# Encode tables for characters up to this code point are arrays indexed by code point
+_ARRAY_TABLE_SIZE = 0x10000
+_expanding_upper = None
+
+def _strip_expanding_upper(text):
+    """Remove the characters that upper-case to several characters, like 'ß'."""
+    global _expanding_upper
+    if _expanding_upper is None:
+        # All of them are in the Basic Multilingual Plane; any that aren't just keep the slow path
+        chars = ''.join(char for char in map(chr, range(0x10000)) if len(char.upper()) != 1)
+        _expanding_upper = re.compile(f"[{re.escape(chars)}]")
+    return _expanding_upper.sub('', text)
+
+class CypherMap:
+    """Compiled form of a cypher scale with the root note applied.
+
+    Holds a char->note table for encoding and a 128-entry note->char array for
+    decoding, so both directions are single lookups. Whole strings and note
+    sequences are converted with str.translate rather than per-character loops.
+    Cyphers with multi-character symbols are encoded by splitting the text
+    with the trie of an Alphabet of the symbols instead.
+    """
+
+    def __init__(self, scale, base_root_note):
+        self.scale = scale
+        self.base_root_note = base_root_note
+        self.char_to_note = {char: base_root_note + interval for char, interval in scale.items()}
+        self.symbols = Alphabet(char for char in self.char_to_note if char)
+
+        # Later entries win on shared notes, like inverting the scale dict
+        self.note_to_char = [None] * 128
+        for char, note in self.char_to_note.items():
+            if 0 <= note < 128:
+                self.note_to_char[note] = char
+
+        chars_by_note = {}
+        for char, note in self.char_to_note.items():
+            chars_by_note.setdefault(note, []).append(char)
+        self.collisions = {note: chars for note, chars in chars_by_note.items() if len(chars) > 1}
+
+        self._encodable = self.symbols.simple and all(0 <= note < 256 for note in self.char_to_note.values())
+        self._encode_tables = {}
+        self._decode_table = _DeletingTable(
+            (note, char) for note, char in enumerate(self.note_to_char) if char is not None
+        )
+
+    def _encode_table(self, unknown):
+        # Each character's note as a Latin-1 character. Characters with no note
+        # are deleted when skipping, which keeps str.translate's fast path for
+        # ASCII text, and otherwise become U+FFFF; characters past the end of
+        # the array are left as they are. Either way none stay in Latin-1.
+        marker = None if unknown == "skip" else '\uffff'
+        table = self._encode_tables.get(marker)
+        if table is None:
+            chars = [char for char in self.char_to_note if len(char) == 1]
+            size = max(256, max(map(ord, chars), default=0) + 1)
+            if size <= _ARRAY_TABLE_SIZE:
+                table = [marker] * size
+            else:
+                table = dict.fromkeys(range(256), marker)
+            for char in chars:
+                table[ord(char)] = chr(self.char_to_note[char])
+            self._encode_tables[marker] = table
+        return table
+
+    def encode(self, text, unknown="skip", replacement=None):
+        """Return the MIDI notes for the symbols of text (case-insensitive).
+
+        ``unknown`` says what happens to symbols not in the map: "skip" drops
+        them, "error" raises ValueError and "replace" uses the note of the
+        ``replacement`` symbol instead.
+        """
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"Unknown symbol handling must be one of {', '.join(UNKNOWN_POLICIES)}.")
+        replacement_note = None
+        if unknown == "replace":
+            replacement_note = self.char_to_note.get((replacement or "").upper())
+            if replacement_note is None:
+                raise ValueError(f"Replacement symbol {replacement!r} is not in the cypher.")
+
+        upper = text.upper()
+        if self._encodable and len(upper) != len(text) and unknown == "skip":
+            # Characters that upper-case to several characters match no single-character symbol
+            text = _strip_expanding_upper(text)
+            upper = text.upper()
+        # Only safe when no character upper-cases to several characters
+        if self._encodable and len(upper) == len(text):
+            mapped = upper.translate(self._encode_table(unknown))
+            if unknown == "skip":
+                return list(mapped.encode('latin-1', 'ignore'))
+            if unknown == "replace":
+                return list(_UNMAPPED.sub(chr(replacement_note), mapped).encode('latin-1'))
+            try:
+                return list(mapped.encode('latin-1'))
+            except UnicodeEncodeError as e:
+                raise ValueError(f"Symbol {upper[e.start]!r} is not in the cypher.") from None
+
+        char_to_note = self.char_to_note
+        if self.symbols.simple:
+            if unknown == "skip":
+                return [char_to_note[char.upper()] for char in text if char.upper() in char_to_note]
+            symbols = [char.upper() for char in text]
+        else:
+            symbols = self.symbols.tokenize(upper)
+            if unknown == "skip":
+                return [char_to_note[symbol] for symbol in symbols if symbol in char_to_note]
+        notes = [char_to_note.get(symbol, replacement_note) for symbol in symbols]
+        if unknown == "error" and None in notes:
+            raise ValueError(f"Symbol {symbols[notes.index(None)]!r} is not in the cypher.")
+        return notes
+
+    def decode(self, notes):
+        """Return the text for a sequence of MIDI notes, skipping notes not in the map."""
+        try:
+            return bytes(notes).decode('latin-1').translate(self._decode_table)
+        except ValueError:
+            note_to_char = self.note_to_char
+            return ''.join(note_to_char[note] for note in notes if 0 <= note < 128 and note_to_char[note] is not None)
+
+class CachedCypher:
+    """A parsed cypher scale with its compiled maps, one per root note."""
+
+    def __init__(self, scale):
+        self.scale = scale
+        self._maps = {}
+
+    def cypher_map(self, base_root_note):
+        cypher_map = self._maps.get(base_root_note)
+        if cypher_map is None:
+            cypher_map = self._maps[base_root_note] = CypherMap(self.scale, base_root_note)
+        return cypher_map
+
+class CypherCache:
+    """Bounded LRU cache of parsed cypher and keyword files.
+
+    Entries are keyed by absolute path and checked against the file's mtime and
+    size on every lookup, so a file edited on disk is re-parsed on its next use.
+    A single instance is shared by all CypherHandlers unless one is passed in.
+    The hits, misses, invalidations and evictions counters can be read through
+    stats() for monitoring.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_scale(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            return CachedCypher({
+                char.strip(): int(value.strip())
+                for line in file if ':' in line
+                for char, value in [line.split(':', 1)]
+            })
+
+    @staticmethod
+    def parse_keyword(path):
+        with open(path, 'r') as file:
+            return file.read().strip().upper()
+
+    def _get(self, kind, filename, parse):
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (kind, path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == signature:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                self.invalidations += 1
+                del self._entries[key]
+            self.misses += 1
+        value = parse(path)
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def load_scale(self, filename):
+        """Return the CachedCypher for a cypher file, parsing it only if new or changed."""
+        return self._get('scale', filename, self.parse_scale)
+
+    def load_keyword(self, filename):
+        """Return the upper-cased keyword stored in a keyword file."""
+        return self._get('keyword', filename, self.parse_keyword)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+CYPHER_CACHE = CypherCache()
+
+class CypherHandler:
+    """Cypher map and keyword for the interactive and batch handlers.
+
+    The cypher and keyword files are read on first use of ``scale``,
+    ``keyword`` or the alphabet rather than in the constructor, so commands
+    that never need them don't pay for the file reads.
+    """
+    def __init__(self, alphabet_manager, filename="default_cypher.txt", base_root_note=60, keyword_file="keyword.txt",
+                 cypher_cache=None):
+        self.alphabet_manager = alphabet_manager
+        self.filename = filename
+        self.base_root_note = base_root_note
+        self.cypher_cache = CYPHER_CACHE if cypher_cache is None else cypher_cache
+        self._cached = None
+        self._cypher_map = None
+        self._scale = None
+        self.keyword_file = keyword_file
+        self._keyword = None
+        self._deferred = lambda: self.scale
+        alphabet_manager.defer(self._deferred)
+
+    @property
+    def scale(self):
+        if self._scale is None:
+            self._scale = self.load_scale_from_file()
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale):
+        self._scale = scale
+
+    @property
+    def keyword(self):
+        if self._keyword is None:
+            self._keyword = self.load_keyword_from_file()
+        return self._keyword
+
+    @keyword.setter
+    def keyword(self, keyword):
+        self._keyword = keyword
+
+    def load_scale_from_file(self):
+        """Load the mapping from a file and update the alphabet."""
+        # set_alphabet below would otherwise run the deferred load of the old file first
+        self.alphabet_manager.cancel(self._deferred)
+        try:
+            self._cached = self.cypher_cache.load_scale(self.filename)
+            scale = self._cached.scale
+            INSTRUMENTATION.emit("cypher_loaded", f"Cypher loaded successfully from '{self.filename}'.",
+                                 filename=self.filename, size=len(scale))
+
+            self._cypher_map = self._cached.cypher_map(self.base_root_note)
+            for note, chars in self._cypher_map.collisions.items():
+                INSTRUMENTATION.emit(
+                    "cypher_collision",
+                    f"Warning: {', '.join(chars)} share interval {note - self.base_root_note}; "
+                    f"decoding returns '{chars[-1]}'.",
+                    level="warning", filename=self.filename, note=note, chars=chars,
+                )
+
+            # Update the alphabet in AlphabetManager
+            self.alphabet_manager.set_alphabet(list(scale))
+
+            return scale
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("cypher_error", f"Error: Cypher file '{self.filename}' not found.",
+                                 level="error", filename=self.filename)
+            return {}
+        except ValueError as e:
+            INSTRUMENTATION.emit("cypher_error", f"Error in cypher file format: {e}",
+                                 level="error", filename=self.filename)
+            return {}
+
+    def reload_if_changed(self):
+        """Reload the cypher map and keyword if their files changed on disk since they were loaded.
+
+        Files that haven't been read yet are left to their first use.
+        Returns True if anything was reloaded.
+        """
+        changed = False
+        try:
+            if self._scale is not None and self.cypher_cache.load_scale(self.filename).scale is not self._scale:
+                self.scale = self.load_scale_from_file()
+                changed = True
+        except (OSError, ValueError):
+            pass
+        try:
+            if self._keyword is not None:
+                keyword = self.cypher_cache.load_keyword(self.keyword_file)
+                if keyword != self._keyword:
+                    self.keyword = keyword
+                    changed = True
+        except OSError:
+            pass
+        return changed
+
+    def reverse_scale(self):
+        return {v: k for k, v in self.scale.items()}
+
+    def get_cypher_map(self, scale=None):
+        """Return the compiled map for scale (default: the loaded one) at the current root note."""
+        scale = self.scale if scale is None else scale
+        cypher_map = self._cypher_map
+        if cypher_map is None or cypher_map.scale is not scale or cypher_map.base_root_note != self.base_root_note:
+            if self._cached is not None and self._cached.scale is scale:
+                cypher_map = self._cached.cypher_map(self.base_root_note)
+            else:
+                cypher_map = CypherMap(scale, self.base_root_note)
+            self._cypher_map = cypher_map
+        return cypher_map
+
+    def load_keyword_from_file(self):
+        try:
+            return self.cypher_cache.load_keyword(self.keyword_file)
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("keyword_missing",
+                                 f"Keyword file '{self.keyword_file}' not found. Defaulting to no keyword.",
+                                 level="warning", filename=self.keyword_file)
+            return ""
+
+    def set_keyword(self, keyword):
+        self.keyword = keyword.upper()
+        with open(self.keyword_file, 'w') as file:
+            file.write(self.keyword)
+        INSTRUMENTATION.emit("keyword_saved", f"Keyword saved to '{self.keyword_file}'.", filename=self.keyword_file)
+
+    def get_keyword(self):
+        return self.keyword
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+# Note name with octave (C-1 to G9) -> MIDI number
+ROOT_NOTES = {f"{NOTE_NAMES[note % 12]}{note // 12 - 1}": note for note in range(128)}
+
+def generate_root_notes():
+    """Return a copy of ROOT_NOTES."""
+    return dict(ROOT_NOTES)
+
+def parse_root_note(value):
+    """Return the MIDI number for a root note given as a name (e.g. C4) or number (0-127)."""
+    text = str(value).strip()
+    if text.isdigit() and 0 <= int(text) < 128:
+        return int(text)
+    if text.upper() in ROOT_NOTES:
+        return ROOT_NOTES[text.upper()]
+    raise ValueError(f"invalid root note: {value}")
@@ -0,0 +1,134 @@
+"""Stage timers, status events and opt-in profiling."""
+import contextlib
+import threading
+import time
+
+class _Stage:
+    """Times one run of a stage; set ``units`` to the amount of work done."""
+    __slots__ = ('instrumentation', 'name', 'units', 'start')
+
+    def __init__(self, instrumentation, name, units):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.units = units
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start, self.units)
+
+class _NullStage:
+    """Stand-in for _Stage when instrumentation is off."""
+    __slots__ = ('units',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+class Instrumentation:
+    """Stage timers, status events and opt-in profiling for the encrypt/decrypt pipeline.
+
+    Status messages go through emit(), which prints them when ``console`` is
+    set (the interactive default) and passes a dict to every registered
+    callback, so batch and service runs can turn console output off and log
+    or count events instead. Stage timing (file read, vigenere, note mapping,
+    MIDI serialise/parse, write) is collected only while ``enabled`` is set;
+    otherwise stage() hands back a shared no-op context.
+    """
+    STAGES = ("read", "vigenere", "note_mapping", "midi_serialise", "midi_parse", "write")
+
+    def __init__(self):
+        self.enabled = False
+        self.console = True
+        self.callbacks = []
+        self.stages = {}
+        self.profile = None
+        self.peak_memory = None
+        self._lock = threading.Lock()
+        self._null_stage = _NullStage()
+
+    def stage(self, name, units=0):
+        if not self.enabled:
+            return self._null_stage
+        return _Stage(self, name, units)
+
+    def record(self, name, seconds, units=0):
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = [0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += units
+
+    def emit(self, event, message=None, level="info", **fields):
+        """Report a status event to the console and to the callbacks."""
+        if self.console and message:
+            print(message)
+        if self.callbacks:
+            record = {"event": event, "level": level, "message": message, "time": time.time(), **fields}
+            for callback in self.callbacks:
+                callback(record)
+
+    def report(self):
+        """Per-stage calls, total seconds, units of work and units per second."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "seconds": seconds,
+                    "units": units,
+                    "units_per_second": units / seconds if seconds else None,
+                }
+                for name, (calls, seconds, units) in self.stages.items()
+            }
+
+    def merge(self, report):
+        """Add a report() from another process into these totals."""
+        for name, entry in report.items():
+            with self._lock:
+                totals = self.stages.setdefault(name, [0, 0.0, 0])
+                totals[0] += entry["calls"]
+                totals[1] += entry["seconds"]
+                totals[2] += entry["units"]
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+
+    @contextlib.contextmanager
+    def capture(self, profile=True, memory=True):
+        """Run the block under cProfile and/or tracemalloc.
+
+        Afterwards ``profile`` holds a pstats.Stats and ``peak_memory`` the
+        peak traced allocation in bytes.
+        """
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        profiler = cProfile.Profile() if profile else None
+        if memory:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler:
+                profiler.disable()
+                self.profile = pstats.Stats(profiler)
+            if memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def print_report(self):
+        for name, entry in sorted(self.report().items(), key=lambda item: -item[1]["seconds"]):
+            rate = f", {entry['units_per_second']:,.0f} units/s" if entry["units_per_second"] else ""
+            print(f"  {name:<15} {entry['calls']:>8} calls {entry['seconds']:>10.3f}s{rate}")
+
+INSTRUMENTATION = Instrumentation()
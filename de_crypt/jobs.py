@@ -0,0 +1,223 @@
+"""Resumable, checkpointed encryption of large text files."""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+from .cypher import AlphabetManager, CypherHandler
+from .instrumentation import INSTRUMENTATION
+from .midi import MIDIEncoder, MIDIHandler, MIDIStreamWriter
+from .options import add_cypher_arguments, add_midi_arguments, handler_options
+from .utils import Utils
+from .vigenere import VigenereCipher
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _write_atomic(path, data):
+    """Replace path with data so that a crash leaves either the old or the new contents."""
+    temp = path + ".tmp"
+    with open(temp, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+
+class EncryptJob:
+    """Encrypt one text file to one MIDI file in segments that survive interruption.
+
+    Each segment of ``segment_size`` characters is encrypted and its track
+    events written to its own file under ``target + ".parts"``, then the
+    checkpoint file records the completed segment count, the read position,
+    the Vigenere key offset and anything held back for an unfinished chord
+    or multi-character symbol.
+    Running the job again resumes after the last recorded segment. finish()
+    joins the segments into the same MIDI file an uninterrupted
+    MIDIHandler.encrypt_text_file run writes.
+
+    The checkpoint also stores digests of the source file, cypher, keyword
+    and MIDI settings, and a job whose inputs changed refuses to resume.
+    Multi-track packing needs every note before writing, so it isn't supported.
+    """
+    VERSION = 1
+
+    def __init__(self, midi_handler, vigenere_cipher, source, target, keyword="", segment_size=None,
+                 checkpoint=None):
+        if midi_handler.tracks > 1:
+            raise ValueError("Resumable jobs write a single track; set tracks to 1.")
+        self.midi_handler = midi_handler
+        self.vigenere_cipher = vigenere_cipher
+        self.source = source
+        self.target = target
+        self.keyword = keyword.upper()
+        self.segment_size = segment_size or Utils.CHUNK_SIZE
+        self.checkpoint = checkpoint or target + ".checkpoint.json"
+        self.parts_dir = target + ".parts"
+
+    def fingerprint(self):
+        """Everything that must be unchanged for a checkpoint to be resumed."""
+        stat = os.stat(self.source)
+        cypher_handler = self.midi_handler.cypher_handler
+        return {
+            "version": self.VERSION,
+            "source": os.path.abspath(self.source),
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "segment_size": self.segment_size,
+            "cypher": _digest(sorted(cypher_handler.scale.items())),
+            "root_note": cypher_handler.base_root_note,
+            "alphabet": _digest(self.vigenere_cipher.alphabet) if self.keyword else None,
+            "keyword": _digest(self.keyword) if self.keyword else None,
+            "note_on_time": self.midi_handler.note_on_time,
+            "note_off_time": self.midi_handler.note_off_time,
+            "chord_size": self.midi_handler.chord_size,
+            "unknown": self.midi_handler.unknown,
+            "replacement": self.midi_handler.replacement,
+        }
+
+    def has_checkpoint(self):
+        return os.path.exists(self.checkpoint)
+
+    def load_state(self, restart=False):
+        """Return the saved progress, or a fresh state when there is none or restart is set."""
+        fingerprint = self.fingerprint()
+        if self.has_checkpoint() and not restart:
+            with open(self.checkpoint, 'r') as file:
+                state = json.load(file)
+            if state.get("fingerprint") != fingerprint:
+                raise ValueError(f"Checkpoint '{self.checkpoint}' was made with a different source file, cypher, "
+                                 "keyword or settings; restart the job to discard it.")
+            return state
+        if os.path.isdir(self.parts_dir):
+            shutil.rmtree(self.parts_dir)
+        return {
+            "fingerprint": fingerprint,
+            "segments": 0,
+            "position": 0,
+            "key_offset": 0,
+            "notes": 0,
+            "events_bytes": 0,
+            "pending": [],
+            "carry": "",
+        }
+
+    def save_state(self, state):
+        _write_atomic(self.checkpoint, json.dumps(state, indent=2).encode('utf-8'))
+
+    def segment_path(self, index):
+        return os.path.join(self.parts_dir, f"segment_{index:06d}.evt")
+
+    def run(self, restart=False):
+        """Encrypt the remaining segments, then join them into the target file.
+
+        Returns the number of notes written. If interrupted, the next run
+        picks up after the last completed segment.
+        """
+        state = self.load_state(restart)
+        if state["segments"]:
+            INSTRUMENTATION.emit("job_resumed", f"Resuming '{self.source}' after {state['segments']} segments.",
+                                 source=self.source, segments=state["segments"])
+        os.makedirs(self.parts_dir, exist_ok=True)
+        midi_handler = self.midi_handler
+        scale = midi_handler.cypher_handler.scale
+        encoder = MIDIEncoder(midi_handler.note_on_time, midi_handler.note_off_time, midi_handler.chord_size)
+        if self.keyword:
+            symbols = self.vigenere_cipher.get_table().symbols
+        else:
+            symbols = midi_handler.cypher_handler.get_cypher_map(scale).symbols
+
+        with open(self.source, 'r') as file:
+            file.seek(state["position"])
+            while True:
+                with INSTRUMENTATION.stage("read") as stage:
+                    text = file.read(self.segment_size)
+                    stage.units = len(text)
+                if not text and not state["carry"]:
+                    break
+                if not symbols.simple:
+                    # Hold back a trailing symbol the next segment might complete, until the end of the file
+                    if text:
+                        text = text.upper().replace(" ", "") if self.keyword else text.upper()
+                        text, state["carry"] = symbols.split_complete(state["carry"] + text)
+                    else:
+                        text, state["carry"] = state["carry"], ""
+                if self.keyword:
+                    text = self.vigenere_cipher.encrypt(text, self.keyword, state["key_offset"])
+                    state["key_offset"] += self.vigenere_cipher.key_length(text)
+                new_notes = midi_handler.text_to_midi_notes(text, scale)
+                notes, state["pending"] = encoder.hold_back(state["pending"], new_notes)
+                with INSTRUMENTATION.stage("midi_serialise", len(notes)):
+                    events = encoder.encode_events(notes, first=not state["events_bytes"])
+                with INSTRUMENTATION.stage("write", len(events)):
+                    _write_atomic(self.segment_path(state["segments"]), events)
+                state["segments"] += 1
+                state["position"] = file.tell()
+                state["notes"] += len(new_notes)
+                state["events_bytes"] += len(events)
+                self.save_state(state)
+                INSTRUMENTATION.emit("job_segment", f"Segment {state['segments']} done, {state['notes']} notes so far.",
+                                     source=self.source, segments=state["segments"], notes=state["notes"])
+        self.finish(state)
+        return state["notes"]
+
+    def finish(self, state):
+        """Join the completed segments into the target MIDI file and remove the job files."""
+        midi_handler = self.midi_handler
+        temp = self.target + ".tmp"
+        with open(temp, 'wb') as file:
+            writer = MIDIStreamWriter(file, midi_handler.note_on_time, midi_handler.note_off_time,
+                                      midi_handler.chord_size)
+            for index in range(state["segments"]):
+                with open(self.segment_path(index), 'rb') as part:
+                    writer.write_events(part.read())
+            writer.write_notes(state["pending"])
+            writer.finish()
+        os.replace(temp, self.target)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        if self.has_checkpoint():
+            os.remove(self.checkpoint)
+        INSTRUMENTATION.emit("midi_created", f"MIDI file '{self.target}' created.",
+                             filename=self.target, notes=state["notes"])
+
+def job_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py job TEXT_FILE [options]``."""
+    parser = argparse.ArgumentParser(prog="DE-CRYPT_4.7.py job",
+                                     description="Encrypt a large text file in resumable, checkpointed segments.")
+    parser.add_argument("source")
+    parser.add_argument("-o", "--output", default=None, help="MIDI file to write (default: named after the source).")
+    add_cypher_arguments(parser)
+    add_midi_arguments(parser, tracks=False)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Processes for the Vigenere cypher on segments of 1M characters or more "
+                             "(default: 1; 0 uses every CPU).")
+    parser.add_argument("--segment-size", type=int, default=Utils.CHUNK_SIZE, help="Characters per segment.")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: OUTPUT.checkpoint.json).")
+    parser.add_argument("--restart", action="store_true", help="Discard any checkpoint and start over.")
+    args = parser.parse_args(argv)
+    if args.segment_size < 1:
+        parser.error("--segment-size must be at least 1")
+    options = handler_options(parser, args)
+
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, options["cypher"], options["root_note"], options["keyword_file"])
+    if not cypher_handler.scale:
+        return 1
+    keyword = options["keyword"] if options["keyword"] is not None else cypher_handler.get_keyword()
+    midi_handler = MIDIHandler(cypher_handler, alphabet_manager, options["note_on_time"], options["note_off_time"],
+                               options["chord_size"], unknown=options["unknown"], replacement=options["replacement"])
+    output = args.output or os.path.splitext(os.path.basename(args.source))[0] + ".mid"
+    vigenere_cipher = VigenereCipher(alphabet_manager, args.workers)
+    try:
+        job = EncryptJob(midi_handler, vigenere_cipher, args.source, output, keyword,
+                         args.segment_size, args.checkpoint)
+        job.run(args.restart)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; run the same command again to resume from '{job.checkpoint}'.")
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        vigenere_cipher.close()
+    return 0
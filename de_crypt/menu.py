@@ -0,0 +1,305 @@
+"""The interactive menu."""
+from .cypher import ROOT_NOTES, UNKNOWN_POLICIES, AlphabetManager, CypherHandler
+from .midi import MIDIHandler
+from .utils import Utils
+from .vigenere import VigenereCipher
+
+def settings_menu(cypher_handler, midi_handler, root_notes, alphabet_manager, vigenere_cipher):
+    while True:
+        print("\nSettings:")
+        print(f"1. Change Library")
+        print(f"2. Change Root Note (Current: {cypher_handler.base_root_note})")
+        print(f"3. Change Cypher File (Current: {cypher_handler.filename})")
+        print(f"4. Change Cypher Keyword (Current: {cypher_handler.get_keyword() or 'None'})")
+        print("5. Create Cypher from MIDI File")
+        print("6. Create Keyword MIDI File")
+        print(f"7. Change Note-On Time (Current: {midi_handler.note_on_time})")
+        print(f"8. Change Note-Off Time (Current: {midi_handler.note_off_time})")
+        print("9. View Current Cypher Map")
+        print(f"10. Change Packing Mode (Current: {midi_handler.chord_size} notes per chord, {midi_handler.tracks} tracks)")
+        print(f"11. Change Unknown Symbol Handling (Current: {midi_handler.unknown})")
+        print(f"12. Change Keyword Worker Processes (Current: {vigenere_cipher.workers})")
+        print("0. Return")
+        setting_choice = input("Enter your choice: ").strip()
+
+        if setting_choice == "1":
+            current_alphabet = alphabet_manager.get_alphabet()
+            print(f"\nCurrent Library: {current_alphabet}")
+            new_alphabet = input("Enter the new library list, separating multi-character symbols with spaces "
+                                 "(or leave blank to keep current): ").strip()
+    
+            if new_alphabet:
+                alphabet_manager.set_alphabet(new_alphabet.split() if " " in new_alphabet else new_alphabet)
+                ##print(f"Library updated to: {new_alphabet}")
+            else:
+                print("Library unchanged.")
+        elif setting_choice == "2":
+            print("\nAvailable:")
+            for name, note in root_notes.items():
+                print(f"{name} (MIDI: {note})")
+            user_input = input("Enter a root note name (e.g., C4) or MIDI number (0-127): ").strip()
+            if user_input.isdigit():
+                midi_number = int(user_input)
+                if 0 <= midi_number < 128:
+                    cypher_handler.base_root_note = midi_number
+                    print(f"Root note set to MIDI {midi_number}.")
+                else:
+                    print("Invalid MIDI. Must be between 0 and 127.")
+            elif user_input.upper() in root_notes:
+                cypher_handler.base_root_note = root_notes[user_input.upper()]
+                print(f"Root note set to {user_input.upper()}.")
+            else:
+                print("Invalid.")
+        elif setting_choice == "3":
+            filename = input("Enter new cypher file path: ").strip()
+            cypher_handler.filename = filename
+            cypher_handler.scale = cypher_handler.load_scale_from_file()
+        elif setting_choice == "4":
+            new_keyword = input("Enter new keyword (leave blank to disable): ").strip()
+            cypher_handler.set_keyword(new_keyword)
+            print(f"Keyword set to: {cypher_handler.get_keyword() or 'None'}")
+        elif setting_choice == "5":
+            midi_file = input("Enter the MIDI file, directory or pattern: ").strip()
+            output_file = input("Enter output cypher file path: ").strip()
+            mode = input("Assign notes by pitch or by frequency? (s/f, default s): ").strip().lower()
+            midi_handler.create_cypher_from_midi(midi_file, output_file, "frequency" if mode == "f" else "sorted")
+        elif setting_choice == "6":
+            keyword = cypher_handler.get_keyword()
+            if not keyword:
+                print("Error: No keyword is set. Please set a keyword first.")
+                continue
+            if not cypher_handler.scale:
+                print("Error: No cypher map is loaded. Please load a cypher map first.")
+                continue
+            midi_handler.create_keyword_midi_file(keyword, cypher_handler.scale)
+        elif setting_choice == "7":
+            midi_handler.note_on_time = int(input("Enter new Note-On time: ").strip())
+        elif setting_choice == "8":
+            midi_handler.note_off_time = int(input("Enter new Note-Off time: ").strip())
+        elif setting_choice == "9":
+            print("\nCurrent Cypher Map:")
+            for char, interval in cypher_handler.scale.items():
+                midi_note = cypher_handler.base_root_note + interval
+                print(f"{char}: {interval} -> {midi_note}")
+        elif setting_choice == "10":
+            print("Packing plays several characters per time step and/or splits the message across tracks.")
+            print("Use 1 and 1 for the original one-note-at-a-time format.")
+            chord_size = input("Enter notes per chord (1 or more): ").strip()
+            tracks = input("Enter number of tracks (1 or more): ").strip()
+            if chord_size.isdigit() and tracks.isdigit() and int(chord_size) >= 1 and int(tracks) >= 1:
+                midi_handler.chord_size = int(chord_size)
+                midi_handler.tracks = int(tracks)
+                print(f"Packing set to {chord_size} notes per chord across {tracks} tracks.")
+            else:
+                print("Invalid. Both values must be whole numbers of at least 1.")
+        elif setting_choice == "11":
+            print("Symbols with no note in the cypher can be skipped, stop encryption with an error,")
+            print("or be replaced by a symbol from the cypher.")
+            unknown = input("Enter skip, error or replace: ").strip().lower()
+            if unknown == "replace":
+                replacement = input("Enter the replacement symbol: ").strip()
+                if replacement.upper() not in cypher_handler.scale:
+                    print("Invalid. The replacement must be a symbol in the cypher.")
+                    continue
+                midi_handler.replacement = replacement
+            elif unknown not in UNKNOWN_POLICIES:
+                print("Invalid choice.")
+                continue
+            midi_handler.unknown = unknown
+            print(f"Unknown symbols will be handled with: {unknown}")
+        elif setting_choice == "12":
+            print("Texts of 1M characters or more can have the keyword applied across several processes.")
+            print("Use 1 to keep everything in one process, or 0 to use every CPU.")
+            workers = input("Enter number of processes: ").strip()
+            if workers.isdigit():
+                vigenere_cipher.set_workers(int(workers))
+                print(f"Keyword worker processes set to {workers}.")
+            else:
+                print("Invalid. Must be a whole number.")
+        elif setting_choice == "0":
+            break
+        else:
+            print("Invalid choice.")
+
+def main():
+    alphabet_manager = AlphabetManager()
+    root_notes = ROOT_NOTES
+    cypher_handler = CypherHandler(alphabet_manager)
+    midi_handler = MIDIHandler(cypher_handler, alphabet_manager)
+    vigenere_cipher = VigenereCipher(alphabet_manager)
+
+    while True:
+        print("\nDE-CRYPT 4.7:")
+        print("1. Generate Randomized MIDI File")
+        print("2. Encrypt Text")
+        print("3. Decrypt Text")
+        print("4. Settings")
+        print("5. Exit")
+
+        choice = input("Enter your choice: ").strip()
+        # Pick up edits made to the cypher or keyword file while the menu was open
+        cypher_handler.reload_if_changed()
+
+        if choice == "1":
+            if not cypher_handler.scale:
+                print("No cypher loaded.")
+                continue
+
+            print("\n1. Generate a random string")
+            print("2. Input a custom message to embed")
+            sub_choice = input("Enter your choice (1 or 2): ").strip()
+
+            if sub_choice == "1":
+                length = int(input("Enter the length of the string: "))
+                valid_chars = list(cypher_handler.scale.keys())
+                random_string = Utils.generate_random_string(length, valid_chars)
+                print(f"Generated Random String: {random_string}")
+
+                keyword = cypher_handler.get_keyword()
+                if keyword:
+                    random_string = vigenere_cipher.encrypt(random_string, keyword)
+                    print(f"Random String after applying Cypher Keyword: {random_string}")
+
+            elif sub_choice == "2":
+                length = int(input("Enter the length of the string: "))
+                message = input("Enter the message to embed: ").strip()
+                if len(message) > length:
+                    print("Error: The message is longer than the total string length.")
+                    continue
+
+                padding_length = length - len(message)
+                left_padding = padding_length // 2
+                right_padding = padding_length - left_padding
+
+                valid_chars = list(cypher_handler.scale.keys())
+                left_padding_str = Utils.generate_random_string(left_padding, valid_chars)
+                right_padding_str = Utils.generate_random_string(right_padding, valid_chars)
+
+                random_string = f"{left_padding_str}{message}{right_padding_str}"
+                print(f"Generated String with Text: {random_string}")
+
+                keyword = cypher_handler.get_keyword()
+                if keyword:
+                    random_string = vigenere_cipher.encrypt(random_string, keyword)
+                    print(f"Text after applying Cypher Keyword: {random_string}")
+            else:
+                print("Invalid choice.")
+                continue
+
+            try:
+                midi_notes = midi_handler.text_to_midi_notes(random_string, cypher_handler.scale)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            midi_handler.create_midi_file(midi_notes, "generated")
+            print(f"Corresponding MIDI Notes: {midi_notes}")
+
+        elif choice == "2":
+            if not cypher_handler.scale:
+                print("No cypher loaded. Please load a cypher first.")
+                continue
+
+            print("\n1. Encrypt from a Text File")
+            print("2. Encrypt from Direct Input")
+            print("3. Encrypt a Large Text File (streaming)")
+            print("4. Encrypt a Large Text File (resumable job)")
+            method = input("Enter 1, 2, 3 or 4: ").strip()
+
+            if method == "1":
+                filepath = input("Enter the path to the text file: ").strip()
+                text = Utils.read_text_from_file(filepath)
+            elif method == "3":
+                filepath = input("Enter the path to the text file: ").strip()
+                filename, note_count = midi_handler.stream_text_file_to_midi(
+                    filepath, "output", vigenere_cipher, cypher_handler.get_keyword()
+                )
+                if filename:
+                    print(f"Encoded {note_count} MIDI notes.")
+                continue
+            elif method == "4":
+                from .jobs import EncryptJob
+                filepath = input("Enter the path to the text file: ").strip()
+                target = input("Enter the MIDI file to write (default output.mid): ").strip() or "output.mid"
+                try:
+                    job = EncryptJob(midi_handler, vigenere_cipher, filepath, target, cypher_handler.get_keyword())
+                    if job.has_checkpoint():
+                        print(f"Resuming from checkpoint '{job.checkpoint}'.")
+                    note_count = job.run()
+                    print(f"Encoded {note_count} MIDI notes.")
+                except KeyboardInterrupt:
+                    print("\nInterrupted; choose this option again with the same files to resume.")
+                except (OSError, ValueError) as e:
+                    print(f"Error: {e}")
+                continue
+            elif method == "2":
+                text = input("Enter the text to encrypt: ").strip()
+            else:
+                print("Invalid choice.")
+                continue
+
+            print(f"Text before encryption: {text}")
+
+            keyword = cypher_handler.get_keyword()
+            if keyword:
+                text = vigenere_cipher.encrypt(text, keyword)
+                print(f"Text after applying Cypher Keyword: {text}")
+
+            try:
+                midi_notes = midi_handler.text_to_midi_notes(text, cypher_handler.scale)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            midi_handler.create_midi_file(midi_notes, "output")
+            print(f"Corresponding MIDI Notes: {midi_notes}")
+
+        elif choice == "3":
+            print("\n1. Decrypt from a MIDI File")
+            print("2. Decrypt from Direct Input")
+            method = input("Enter 1 or 2: ").strip()
+
+            if method == "1":
+                file = input("Enter the MIDI file path: ").strip()
+                decrypted_text, midi_notes = midi_handler.midi_to_text(file, cypher_handler.scale)
+                print(f"Decrypted Text from MIDI Notes: {decrypted_text}")
+
+                keyword = cypher_handler.get_keyword()
+                if keyword:
+                    original_plaintext = vigenere_cipher.decrypt(decrypted_text, keyword)
+                    print(f"Text before applying Cypher Keyword: {original_plaintext}")
+                else:
+                    original_plaintext = decrypted_text
+                    print("No keyword set, original plaintext is the same as decrypted text.")
+
+                output_filename = Utils.get_sequential_filename("decrypt", ".txt")
+                with open(output_filename, 'w') as file:
+                    file.write(original_plaintext)
+                print(f"Decrypted text saved to '{output_filename}'.")
+                print(f"Corresponding MIDI Notes: {midi_notes}")
+
+            elif method == "2":
+                text = input("Enter the raw text to decrypt: ").strip()
+                keyword = cypher_handler.get_keyword()
+                if keyword:
+                    original_plaintext = vigenere_cipher.decrypt(text, keyword)
+                    print(f"Text before applying Cypher Keyword: {original_plaintext}")
+                else:
+                    original_plaintext = text
+                    print("No keyword set, original plaintext is the same as input text.")
+
+                output_filename = Utils.get_sequential_filename("decrypt", ".txt")
+                with open(output_filename, 'w') as file:
+                    file.write(original_plaintext)
+                print(f"Decrypted text saved to '{output_filename}'.")
+            else:
+                print("Invalid choice.")
+
+        elif choice == "4":
+            settings_menu(cypher_handler, midi_handler, root_notes, alphabet_manager, vigenere_cipher)
+
+        elif choice == "5":
+            break
+
+        else:
+            print("Invalid choice.")
+
+    vigenere_cipher.close()
@@ -0,0 +1,727 @@
+"""MIDI encoding and decoding of note sequences."""
+import itertools
+import mmap
+import os
+import struct
+
+from .cypher import Alphabet
+from .instrumentation import INSTRUMENTATION
+from .utils import Utils, collect_batch_inputs
+from .vigenere import ENGLISH_FREQUENCIES, ByteCipher
+
+class MIDIEncoder:
+    """Serialise note sequences to Standard MIDI File bytes.
+
+    By default each note becomes a note_on/note_off pair on a single track,
+    giving the same bytes as a MidiFile holding one MidiTrack of those messages
+    saved with mido. Errors are raised rather than printed.
+
+    Packed mode (chord_size > 1 or tracks > 1) shrinks the output: the notes
+    are split into ``tracks`` contiguous segments, one track (and channel) per
+    segment, and each track plays ``chord_size`` notes per time step as a
+    chord. Events use running status and note_on with velocity 0 as note off,
+    so most events take three bytes. Note_on events still appear in text
+    order when the tracks are read one after another, so midi_to_text decodes
+    packed files unchanged.
+    """
+    TICKS_PER_BEAT = 480
+    VELOCITY = 32
+    TRACK_HEADER_SIZE = 8
+    END_OF_TRACK = b'\x00\xff\x2f\x00'
+
+    def __init__(self, note_on_time=0, note_off_time=480, chord_size=1, tracks=1):
+        if chord_size < 1 or tracks < 1:
+            raise ValueError("Chord size and track count must be at least 1.")
+        self.note_on_time = note_on_time
+        self.note_off_time = note_off_time
+        self.chord_size = chord_size
+        self.tracks = tracks
+        self.packed = chord_size > 1 or tracks > 1
+        self.on_delta = on_delta = self.encode_variable_int(note_on_time)
+        self.off_delta = off_delta = self.encode_variable_int(note_off_time)
+        velocity = self.VELOCITY
+        self.pairs = [
+            on_delta + bytes((0x90, note, velocity)) + off_delta + bytes((0x80, note, velocity))
+            for note in range(128)
+        ]
+        self.pair_size = len(self.pairs[0])
+        # Offsets of the two note bytes within a pair
+        self._pair_notes = (len(on_delta) + 1, len(on_delta) + 3 + len(off_delta) + 1)
+        # Running-status events for packed mode: first and remaining notes of a chord
+        self._on_first = [on_delta + bytes((note, velocity)) for note in range(128)]
+        self._on_rest = [bytes((0, note, velocity)) for note in range(128)]
+        self._off_first = [off_delta + bytes((note, 0)) for note in range(128)]
+        self._off_rest = [bytes((0, note, 0)) for note in range(128)]
+
+    @staticmethod
+    def encode_variable_int(value):
+        """Encode a non-negative integer as a MIDI variable-length quantity."""
+        if not isinstance(value, int) or value < 0:
+            raise ValueError(f"MIDI delta time must be a non-negative int, got {value!r}.")
+        encoded = [value & 0x7F]
+        value >>= 7
+        while value:
+            encoded.append((value & 0x7F) | 0x80)
+            value >>= 7
+        return bytes(reversed(encoded))
+
+    def header(self):
+        return b'MThd' + struct.pack('>IHHH', 6, 1, self.tracks, self.TICKS_PER_BEAT)
+
+    def segments(self, notes):
+        """Split notes into one contiguous segment per track."""
+        if self.tracks == 1:
+            return [notes]
+        length = -(-len(notes) // self.tracks)
+        return [notes[i * length:(i + 1) * length] for i in range(self.tracks)]
+
+    def hold_back(self, pending, notes):
+        """Append notes to the pending ones and hold back those that don't fill a whole chord yet.
+
+        Returns (notes to encode now, notes still pending). Outside packed mode
+        nothing is held back.
+        """
+        if not self.packed:
+            return (pending + list(notes) if pending else notes), []
+        notes = pending + list(notes)
+        split = len(notes) - len(notes) % self.chord_size
+        return notes[:split], notes[split:]
+
+    def encode_events(self, notes, channel=0, first=True):
+        """Return the track events for notes, without chunk header or end of track.
+
+        In packed mode notes should be a whole number of chords unless they
+        end the track, and ``first`` marks the start of a track, where the
+        running status byte is written.
+        """
+        if not notes:
+            return b''
+        if min(notes) < 0 or max(notes) > 127:
+            raise ValueError("MIDI notes must be between 0 and 127.")
+        if not self.packed:
+            # Every pair is the same apart from its note bytes, so fill those in
+            # by slice rather than joining one bytes object per note
+            events = bytearray(self.pairs[0]) * len(notes)
+            for offset in self._pair_notes:
+                events[offset::self.pair_size] = notes
+            return events
+
+        on_first, on_rest = self._on_first, self._on_rest
+        off_first, off_rest = self._off_first, self._off_rest
+        parts = []
+        for start in range(0, len(notes), self.chord_size):
+            chord = notes[start:start + self.chord_size]
+            parts.append(on_first[chord[0]])
+            parts.extend([on_rest[note] for note in chord[1:]])
+            parts.append(off_first[chord[0]])
+            parts.extend([off_rest[note] for note in chord[1:]])
+        if first:
+            parts[0] = self.on_delta + bytes((0x90 | channel % 16, notes[0], self.VELOCITY))
+        return b''.join(parts)
+
+    def events_size(self, note_count):
+        """Size in bytes of encode_events output for a whole track of note_count notes."""
+        if not self.packed:
+            return note_count * self.pair_size
+        if not note_count:
+            return 0
+        chords = -(-note_count // self.chord_size)
+        return 1 + chords * (len(self.on_delta) + len(self.off_delta) + 4) + (note_count - chords) * 6
+
+    def size(self, note_count):
+        """Size in bytes of the encoded file for note_count notes."""
+        segment_sizes = [len(segment) for segment in self.segments(range(note_count))]
+        return 14 + sum(
+            self.TRACK_HEADER_SIZE + self.events_size(count) + len(self.END_OF_TRACK)
+            for count in segment_sizes
+        )
+
+    def encode_into(self, notes, buffer, offset=0):
+        """Write the complete MIDI file for notes into a writable buffer at offset.
+
+        Returns the number of bytes written. Raises ValueError if the buffer is
+        too small.
+        """
+        total = self.size(len(notes))
+        view = memoryview(buffer).cast('B')
+        if offset < 0 or offset + total > len(view):
+            raise ValueError(f"Buffer too small: {total} bytes needed at offset {offset}.")
+        header = self.header()
+        pos = offset
+        view[pos:pos + len(header)] = header
+        pos += len(header)
+        for channel, segment in enumerate(self.segments(notes)):
+            events = self.encode_events(segment, channel)
+            struct.pack_into('>4sI', view, pos, b'MTrk', len(events) + len(self.END_OF_TRACK))
+            pos += self.TRACK_HEADER_SIZE
+            view[pos:pos + len(events)] = events
+            pos += len(events)
+            view[pos:pos + len(self.END_OF_TRACK)] = self.END_OF_TRACK
+            pos += len(self.END_OF_TRACK)
+        return total
+
+    def encode(self, notes):
+        """Return the complete MIDI file for notes as a bytearray."""
+        buffer = bytearray(self.size(len(notes)))
+        self.encode_into(notes, buffer)
+        return buffer
+
+class MIDIStreamWriter:
+    """Write a single-track note MIDI file incrementally.
+
+    Produces the same bytes as MIDIEncoder.encode, but events are written as
+    they arrive instead of being held in memory. Chord packing is supported;
+    multi-track packing is not, since each track's length depends on the whole
+    input. The output file must be seekable so the track length can be filled
+    in by finish().
+    """
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, file, note_on_time=0, note_off_time=480, chord_size=1):
+        self.file = file
+        self.note_count = 0
+        self.encoder = MIDIEncoder(note_on_time, note_off_time, chord_size)
+        self._buffer = bytearray()
+        self._pending = []
+        self._track_length = 0
+        self.file.write(self.encoder.header())
+        self._length_position = self.file.tell() + 4
+        self.file.write(b'MTrk\x00\x00\x00\x00')
+
+    def write_notes(self, notes):
+        """Append the events for notes."""
+        with INSTRUMENTATION.stage("midi_serialise", len(notes)):
+            self._write_notes(notes)
+
+    def _write_notes(self, notes):
+        self.note_count += len(notes)
+        notes, self._pending = self.encoder.hold_back(self._pending, notes)
+        self._buffer += self.encoder.encode_events(notes, first=not self._track_length and not self._buffer)
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self.flush()
+
+    def write_events(self, events):
+        """Append track events already encoded with encode_events, continuing the same track."""
+        self._buffer += events
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        with INSTRUMENTATION.stage("write", len(self._buffer)):
+            self.file.write(self._buffer)
+        self._track_length += len(self._buffer)
+        self._buffer = bytearray()
+
+    def finish(self):
+        """Write the end-of-track event and patch the track length."""
+        if self._pending:
+            self._buffer += self.encoder.encode_events(self._pending, first=not self._track_length and not self._buffer)
+            self._pending = []
+        self._buffer += MIDIEncoder.END_OF_TRACK
+        self.flush()
+        end = self.file.tell()
+        self.file.seek(self._length_position)
+        self.file.write(struct.pack('>I', self._track_length))
+        self.file.seek(end)
+
+class MIDIParseError(ValueError):
+    """Raised when SMFNoteReader cannot parse a MIDI file."""
+
+class SMFNoteReader:
+    """Scan Standard MIDI File track chunks for sounding note_on events.
+
+    The file is memory-mapped and walked byte by byte, following running
+    status and skipping meta and sysex events, so only the note numbers are
+    produced instead of a Message object per event. Notes come out in the same
+    order as iterating the tracks of a mido MidiFile.
+    """
+    # Data byte counts for status bytes other than note_on, meta and sysex
+    DATA_LENGTHS = {
+        **{status: 1 if 0xC0 <= status <= 0xDF else 2 for status in range(0x80, 0xF0)},
+        0xF1: 1, 0xF2: 2, 0xF3: 1, 0xF6: 0, 0xF8: 0, 0xFA: 0, 0xFB: 0, 0xFC: 0, 0xFE: 0,
+    }
+
+    # Bytes of a mapped file scanned between releasing its pages
+    RELEASE_SPAN = 1 << 22
+
+    @classmethod
+    def iter_notes(cls, filename, release=False):
+        """Yield the note number of every note_on event with velocity > 0.
+
+        With release=True pages already scanned are dropped from the resident
+        set as the scan goes, keeping memory flat for very large files.
+        """
+        with open(filename, 'rb') as file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise MIDIParseError(f"MIDI file '{filename}' is empty.") from None
+            with data:
+                try:
+                    yield from cls._scan_file(data, release)
+                except (IndexError, struct.error) as e:
+                    raise MIDIParseError(f"MIDI file '{filename}' is truncated.") from e
+
+    @classmethod
+    def iter_bytes_notes(cls, data):
+        """Like iter_notes, for MIDI file contents already in memory."""
+        try:
+            yield from cls._scan_file(data)
+        except (IndexError, struct.error) as e:
+            raise MIDIParseError("MIDI data is truncated.") from e
+
+    @classmethod
+    def _scan_file(cls, data, release=False):
+        if data[:4] != b'MThd':
+            raise MIDIParseError("MThd not found. Probably not a MIDI file.")
+        header_length = struct.unpack('>I', data[4:8])[0]
+        if header_length < 6:
+            raise MIDIParseError("MIDI header is too short.")
+        num_tracks = struct.unpack('>H', data[10:12])[0]
+        pos = 8 + header_length
+        for _ in range(num_tracks):
+            if data[pos:pos + 4] != b'MTrk':
+                raise MIDIParseError("No MTrk header at start of track.")
+            end = pos + 8 + struct.unpack('>I', data[pos + 4:pos + 8])[0]
+            if end > len(data):
+                raise MIDIParseError("Track chunk runs past the end of the file.")
+            yield from cls._scan_track(data, pos + 8, end, release)
+            pos = end
+
+    @classmethod
+    def _scan_track(cls, data, pos, end, release=False):
+        data_lengths = cls.DATA_LENGTHS
+        last_status = None
+        released = pos
+        release_at = pos + cls.RELEASE_SPAN if release else end
+        while pos < end:
+            # Delta time is not needed, skip over its bytes
+            while data[pos] & 0x80:
+                pos += 1
+            pos += 1
+
+            status = data[pos]
+            if status < 0x80:
+                if last_status is None:
+                    raise MIDIParseError("Running status without a previous status byte.")
+                status = last_status
+            else:
+                pos += 1
+                if status != 0xFF:
+                    # Meta events don't set running status
+                    last_status = status
+
+            if 0x90 <= status <= 0x9F:
+                note = data[pos]
+                velocity = data[pos + 1]
+                if note > 127 or velocity > 127:
+                    raise MIDIParseError("Data byte must be in range 0..127.")
+                pos += 2
+                if velocity:
+                    yield note
+                if pos > release_at:
+                    Utils.release_mapped(data, released, pos)
+                    released, release_at = pos, pos + cls.RELEASE_SPAN
+            elif status == 0xFF or status == 0xF0 or status == 0xF7:
+                if status == 0xFF:
+                    pos += 1  # meta type
+                length = 0
+                while True:
+                    byte = data[pos]
+                    pos += 1
+                    length = (length << 7) | (byte & 0x7F)
+                    if not byte & 0x80:
+                        break
+                pos += length
+            else:
+                length = data_lengths.get(status)
+                if length is None:
+                    raise MIDIParseError(f"Undefined status byte 0x{status:02x}.")
+                pos += length
+        if pos != end:
+            raise MIDIParseError("Event runs past the end of its track chunk.")
+
+def mido_notes(filename=None, file=None):
+    """Return the notes of every note_on event with velocity > 0, read with mido.
+
+    mido is only needed for files SMFNoteReader can't parse, so it is
+    imported on first use rather than with this module.
+    """
+    from mido import MidiFile
+    mid = MidiFile(filename, file=file)
+    return [msg.note for track in mid.tracks for msg in track if msg.type == 'note_on' and msg.velocity > 0]
+
+def midi_note_histogram(filename):
+    """Count how often each of the 128 notes is played in a MIDI file.
+
+    Notes are streamed from the file, so only the 128 counters are kept.
+    Files SMFNoteReader can't parse are read with mido instead.
+    """
+    counts = [0] * 128
+    try:
+        for note in SMFNoteReader.iter_notes(filename):
+            counts[note] += 1
+    except MIDIParseError:
+        counts = [0] * 128
+        for note in mido_notes(filename):
+            counts[note] += 1
+    return counts
+
+def _run_histogram_job(filename):
+    """Histogram one MIDI file in a worker, reporting errors instead of raising."""
+    try:
+        return filename, midi_note_histogram(filename), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+class MIDIHandler:
+    def __init__(self, cypher_handler, alphabet_manager, note_on_time=0, note_off_time=480, chord_size=1, tracks=1,
+                 unknown="skip", replacement=None):
+        self.cypher_handler = cypher_handler
+        self.alphabet_manager = alphabet_manager
+        self.note_on_time = note_on_time
+        self.note_off_time = note_off_time
+        self.chord_size = chord_size
+        self.tracks = tracks
+        # What text_to_midi_notes does with symbols not in the cypher; see CypherMap.encode
+        self.unknown = unknown
+        self.replacement = replacement
+        self._encoder = None
+        self._byte_cipher = None
+
+    @property
+    def base_root_note(self):
+        return self.cypher_handler.base_root_note
+
+    def text_to_midi_notes(self, text, scale):
+        with INSTRUMENTATION.stage("note_mapping", len(text)):
+            return self.cypher_handler.get_cypher_map(scale).encode(text, self.unknown, self.replacement)
+
+    def read_midi_notes(self, filename, native=True):
+        """Return the notes of every note_on event with velocity > 0 in a MIDI file.
+
+        Uses SMFNoteReader unless native is False, falling back to mido for
+        files the native reader cannot parse.
+        """
+        with INSTRUMENTATION.stage("midi_parse") as stage:
+            if native:
+                try:
+                    notes = list(SMFNoteReader.iter_notes(filename))
+                    stage.units = len(notes)
+                    return notes
+                except MIDIParseError:
+                    pass
+            notes = mido_notes(filename)
+            stage.units = len(notes)
+            return notes
+
+    def midi_to_text(self, filename, scale, native=True):
+        try:
+            midi_notes = self.read_midi_notes(filename, native)
+            with INSTRUMENTATION.stage("note_mapping", len(midi_notes)):
+                text = self.cypher_handler.get_cypher_map(scale).decode(midi_notes)
+            return text, midi_notes
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("midi_error", f"Error: MIDI file '{filename}' not found.",
+                                 level="error", filename=filename)
+            return "", []
+
+    def iter_midi_notes(self, chunks, scale):
+        """Map an iterable of text chunks to lists of MIDI notes, one list per chunk."""
+        for chunk in chunks:
+            yield self.text_to_midi_notes(chunk, scale)
+
+    def encrypt_text_file(self, filepath, filename, vigenere_cipher=None, keyword="", chunk_size=None):
+        """Encrypt a text file to the MIDI file ``filename`` chunk by chunk with bounded memory.
+
+        Produces the same file as reading the whole text, encrypting it and
+        calling create_midi_file. Returns the number of notes written; errors
+        are raised to the caller. Multi-track packing needs every note before
+        the first track can be written, so with tracks > 1 the notes are
+        collected in memory first.
+        """
+        chunk_size = chunk_size or Utils.CHUNK_SIZE
+        with Utils.map_text_file(filepath) as data:
+            byte_cipher = self.get_byte_cipher(vigenere_cipher, keyword) if Utils.is_plain_ascii(data) else None
+            if byte_cipher is not None:
+                note_chunks = self.iter_byte_notes(byte_cipher, Utils.iter_mapped_chunks(data, chunk_size))
+            else:
+                chunks = Utils.iter_text_from_file(filepath, chunk_size)
+                if keyword:
+                    chunks = vigenere_cipher.encrypt_chunks(chunks, keyword)
+                else:
+                    symbols = self.cypher_handler.get_cypher_map(self.cypher_handler.scale).symbols
+                    chunks = symbols.rechunk(chunk.upper() for chunk in chunks) if not symbols.simple else chunks
+                note_chunks = self.iter_midi_notes(chunks, self.cypher_handler.scale)
+            if self.tracks > 1:
+                notes = [note for chunk_notes in note_chunks for note in chunk_notes]
+                self.write_midi_file(notes, filename)
+                return len(notes)
+            with open(filename, 'wb') as file:
+                writer = MIDIStreamWriter(file, self.note_on_time, self.note_off_time, self.chord_size)
+                for notes in note_chunks:
+                    writer.write_notes(notes)
+                writer.finish()
+        return writer.note_count
+
+    def get_byte_cipher(self, vigenere_cipher=None, keyword=""):
+        """Return a ByteCipher for the loaded cypher and keyword, or None if they need the text path.
+
+        ByteCipher always skips unknown symbols, so other unknown handling takes the text path.
+        """
+        if self.unknown != "skip":
+            return None
+        cypher_map = self.cypher_handler.get_cypher_map(self.cypher_handler.scale)
+        table = vigenere_cipher.get_table() if keyword else None
+        cached = self._byte_cipher
+        if cached is None or cached[0] is not cypher_map or cached[1] is not table or cached[2] != keyword:
+            cached = self._byte_cipher = (cypher_map, table, keyword, ByteCipher.create(cypher_map, table, keyword))
+        return cached[3]
+
+    @staticmethod
+    def iter_byte_notes(byte_cipher, chunks):
+        """Encrypt chunks of ASCII text to bytes of notes, carrying the key position across them."""
+        offset = 0
+        for chunk in chunks:
+            with INSTRUMENTATION.stage("note_mapping", len(chunk)):
+                notes, length = byte_cipher.encrypt(chunk, offset)
+            offset += length
+            yield notes
+
+    @staticmethod
+    def iter_note_chunks(filename, chunk_size=None):
+        """Yield the notes of a MIDI file as bytes, at most chunk_size notes at a time."""
+        chunk_size = chunk_size or Utils.CHUNK_SIZE
+        notes = SMFNoteReader.iter_notes(filename, release=True)
+        while True:
+            with INSTRUMENTATION.stage("midi_parse") as stage:
+                chunk = bytes(itertools.islice(notes, chunk_size))
+                stage.units = len(chunk)
+            if not chunk:
+                return
+            yield chunk
+
+    def decrypt_midi_file(self, filename, target, vigenere_cipher=None, keyword="", chunk_size=None):
+        """Decrypt a MIDI file to the text file ``target`` chunk by chunk with bounded memory.
+
+        Produces the same text as midi_to_text followed by
+        VigenereCipher.decrypt. Cyphers with single-byte ASCII symbols are
+        decoded with ByteCipher and written as bytes; others go through the
+        text path. Returns the number of notes read; errors are raised.
+        """
+        try:
+            return self._decrypt_note_chunks(
+                self.iter_note_chunks(filename, chunk_size or Utils.CHUNK_SIZE), target, vigenere_cipher, keyword
+            )
+        except MIDIParseError:
+            notes = bytes(self.read_midi_notes(filename, native=False))
+            return self._decrypt_note_chunks([notes], target, vigenere_cipher, keyword)
+
+    def _decrypt_note_chunks(self, note_chunks, target, vigenere_cipher, keyword):
+        byte_cipher = self.get_byte_cipher(vigenere_cipher, keyword)
+        count = offset = 0
+        if byte_cipher is not None:
+            with open(target, 'wb') as file:
+                for notes in note_chunks:
+                    count += len(notes)
+                    with INSTRUMENTATION.stage("note_mapping", len(notes)):
+                        text = byte_cipher.decrypt(notes, offset)
+                    offset += len(text)
+                    with INSTRUMENTATION.stage("write", len(text)):
+                        file.write(text)
+            return count
+        cypher_map = self.cypher_handler.get_cypher_map(self.cypher_handler.scale)
+        with open(target, 'w') as file:
+            for notes in note_chunks:
+                count += len(notes)
+                with INSTRUMENTATION.stage("note_mapping", len(notes)):
+                    text = cypher_map.decode(notes)
+                if keyword:
+                    text = vigenere_cipher.decrypt(text, keyword, offset)
+                    offset += vigenere_cipher.key_length(text)
+                with INSTRUMENTATION.stage("write", len(text)):
+                    file.write(text)
+        return count
+
+    def stream_text_file_to_midi(self, filepath, filename_base, vigenere_cipher=None, keyword="", chunk_size=None):
+        """Streaming counterpart of create_midi_file for a whole text file.
+
+        Returns the output filename and note count, or (None, 0) on error.
+        """
+        filename = Utils.get_sequential_filename(filename_base, ".mid")
+        try:
+            note_count = self.encrypt_text_file(filepath, filename, vigenere_cipher, keyword, chunk_size)
+            INSTRUMENTATION.emit("midi_created", f"MIDI file '{filename}' created.", filename=filename, notes=note_count)
+            return filename, note_count
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("read_error", f"Error: File '{filepath}' not found.", level="error", filename=filepath)
+        except Exception as e:
+            INSTRUMENTATION.emit("midi_error", f"Error creating MIDI file: {e}", level="error", filename=filename)
+        if os.path.exists(filename):
+            os.remove(filename)
+        return None, 0
+
+    def get_encoder(self):
+        """Return a MIDIEncoder for the current note timings and packing mode."""
+        settings = (self.note_on_time, self.note_off_time, self.chord_size, self.tracks)
+        encoder = self._encoder
+        if encoder is None or (encoder.note_on_time, encoder.note_off_time, encoder.chord_size, encoder.tracks) != settings:
+            encoder = self._encoder = MIDIEncoder(*settings)
+        return encoder
+
+    def encode_midi(self, notes):
+        """Encode notes as a complete MIDI file in memory and return it as a bytearray."""
+        with INSTRUMENTATION.stage("midi_serialise", len(notes)):
+            return self.get_encoder().encode(notes)
+
+    def encode_midi_into(self, notes, buffer, offset=0):
+        """Encode notes as a MIDI file into a writable buffer; returns the number of bytes written."""
+        return self.get_encoder().encode_into(notes, buffer, offset)
+
+    def write_midi_file(self, notes, filename):
+        """Write notes to filename as a MIDI file, raising on errors."""
+        data = self.encode_midi(notes)
+        with INSTRUMENTATION.stage("write", len(data)), open(filename, 'wb') as file:
+            file.write(data)
+
+    def create_midi_file(self, notes, filename_base):
+        try:
+            filename = Utils.get_sequential_filename(filename_base, ".mid")
+            self.write_midi_file(notes, filename)
+            INSTRUMENTATION.emit("midi_created", f"MIDI file '{filename}' created.", filename=filename, notes=len(notes))
+        except Exception as e:
+            INSTRUMENTATION.emit("midi_error", f"Error creating MIDI file: {e}", level="error")
+
+    @staticmethod
+    def note_histogram(inputs, workers=None):
+        """Merge the note histograms of MIDI files, directories or glob patterns.
+
+        Files are counted in a process pool, each worker streaming one file at
+        a time; only the per-file counts travel back to be summed. Returns the
+        merged counts and a list of (filename, error) for unreadable files.
+        """
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        files = collect_batch_inputs(inputs, "decrypt")
+        if not files:
+            raise FileNotFoundError(f"No MIDI files found in {', '.join(inputs)}.")
+        totals = [0] * 128
+        errors = []
+        workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+        with INSTRUMENTATION.stage("midi_parse") as stage:
+            if workers == 1:
+                results = map(_run_histogram_job, files)
+                executor = None
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                executor = ProcessPoolExecutor(max_workers=workers)
+                results = executor.map(_run_histogram_job, files, chunksize=max(1, min(64, len(files) // (workers * 4))))
+            try:
+                for filename, counts, error in results:
+                    if error:
+                        errors.append((filename, error))
+                        continue
+                    for note, count in enumerate(counts):
+                        totals[note] += count
+            finally:
+                if executor:
+                    executor.shutdown()
+            stage.units = sum(totals)
+        return totals, errors
+
+    @staticmethod
+    def symbol_ranking(alphabet, reference=None):
+        """Distinct alphabet symbols from most to least common.
+
+        alphabet is an Alphabet or a string of single-character symbols.
+        Frequencies come from the symbols of the reference text when given,
+        otherwise from English letter frequencies; symbols without a frequency
+        keep their alphabet order after the rest.
+        """
+        alphabet = alphabet if isinstance(alphabet, Alphabet) else Alphabet(alphabet)
+        if reference:
+            weights = {}
+            for symbol in alphabet.tokenize(reference.upper()):
+                weights[symbol] = weights.get(symbol, 0) + 1
+        else:
+            weights = ENGLISH_FREQUENCIES
+        return sorted(alphabet.index, key=lambda symbol: -weights.get(symbol, 0))
+
+    @classmethod
+    def derive_cypher_map(cls, histogram, alphabet, mode="sorted", reference=None):
+        """Assign alphabet symbols to the notes played in histogram.
+
+        alphabet is an Alphabet or a string of single-character symbols, and
+        each distinct symbol gets at most one note. "sorted" maps symbols in
+        alphabet order to notes in pitch order. "frequency" maps the most
+        common notes to the most common symbols.
+        Raises ValueError if histogram has no notes.
+        """
+        if not any(histogram):
+            raise ValueError("No notes could be read from the MIDI input.")
+        alphabet = alphabet if isinstance(alphabet, Alphabet) else Alphabet(alphabet)
+        if mode == "sorted":
+            notes = [note for note, count in enumerate(histogram) if count]
+            symbols = list(alphabet.index)
+        elif mode == "frequency":
+            notes = sorted((note for note, count in enumerate(histogram) if count), key=lambda note: -histogram[note])
+            symbols = cls.symbol_ranking(alphabet, reference)
+        else:
+            raise ValueError(f"Unknown cypher mode '{mode}'.")
+        assigned = dict(zip(symbols, notes))
+        # Keep alphabet order so loading the cypher doesn't reorder the alphabet
+        return {symbol: assigned[symbol] for symbol in alphabet.index if symbol in assigned}
+
+    def create_cypher_from_midi(self, midi_file, output_cypher_file, mode="sorted", reference=None, workers=None):
+        """Create a cypher map from the notes in one or more MIDI files.
+
+        midi_file may be a file, a directory, a glob pattern or a list of them.
+        """
+        try:
+            histogram, errors = self.note_histogram(midi_file, workers)
+            for filename, error in errors:
+                INSTRUMENTATION.emit("midi_error", f"Skipped '{filename}': {error}", level="warning", filename=filename)
+
+            # Get the current alphabet
+            if not hasattr(self, 'alphabet_manager') or not callable(getattr(self.alphabet_manager, 'get_symbols', None)):
+                INSTRUMENTATION.emit("cypher_error",
+                                     "Error: AlphabetManager is not initialized or get_symbols is not available.",
+                                     level="error")
+                return
+
+            alphabet = self.alphabet_manager.get_symbols()
+
+            # Map alphabet characters to MIDI notes
+            cypher_map = self.derive_cypher_map(histogram, alphabet, mode, reference)
+
+            with open(output_cypher_file, 'w', encoding='utf-8') as file:
+                for char, note in cypher_map.items():
+                    file.write(f"{char}: {note}\n")
+
+            INSTRUMENTATION.emit("cypher_created", f"Cypher created and saved to '{output_cypher_file}'.",
+                                 filename=output_cypher_file)
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("midi_error", f"Error: MIDI file '{midi_file}' not found.", level="error", filename=midi_file)
+        except Exception as e:
+            INSTRUMENTATION.emit("cypher_error", f"Error creating cypher: {e}", level="error")
+
+    def create_keyword_midi_file(self, keyword, scale, filename_base="keyword_midi"):
+        if not keyword or not scale:
+            INSTRUMENTATION.emit("midi_error", "Error: Keyword is empty or scale is not loaded.", level="error")
+            return
+
+        # Convert the keyword to MIDI notes using the scale
+        midi_notes = self.text_to_midi_notes(keyword, scale)
+
+        if not midi_notes:
+            INSTRUMENTATION.emit("midi_error", "Error: No valid notes generated from the keyword.", level="error")
+            return
+
+        # Create a MIDI file with the notes
+        try:
+            filename = Utils.get_sequential_filename(filename_base, ".mid")
+            self.write_midi_file(midi_notes, filename)
+            INSTRUMENTATION.emit("midi_created", f"Keyword MIDI file '{filename}' created.",
+                                 filename=filename, notes=len(midi_notes))
+        except Exception as e:
+            INSTRUMENTATION.emit("midi_error", f"Error creating keyword MIDI file: {e}", level="error")
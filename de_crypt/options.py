@@ -0,0 +1,57 @@
+"""Command line options shared by the non-interactive commands.
+
+Only argparse and the cypher module are imported, so the one-shot commands
+can use these without loading the batch, service or job code.
+"""
+from .cypher import UNKNOWN_POLICIES, parse_root_note
+
+def add_cypher_arguments(parser, keyword=True):
+    """Options for loading the cypher map and, unless keyword is False, the Vigenere keyword."""
+    parser.add_argument("-c", "--cypher", default="default_cypher.txt", help="Cypher map file.")
+    if keyword:
+        parser.add_argument("-k", "--keyword", default=None, help="Vigenere keyword (overrides the keyword file).")
+        parser.add_argument("--keyword-file", default="keyword.txt")
+    parser.add_argument("-r", "--root-note", default="60", help="Root note name (e.g. C4) or MIDI number.")
+
+def add_midi_arguments(parser, tracks=True):
+    """Options for the MIDI output of encryption; tracks=False for commands that write a single track."""
+    parser.add_argument("--note-on-time", type=int, default=0)
+    parser.add_argument("--note-off-time", type=int, default=480)
+    parser.add_argument("--chord-size", type=int, default=1, help="Notes per chord in packed output.")
+    if tracks:
+        parser.add_argument("--tracks", type=int, default=1, help="Tracks to split packed output across.")
+    parser.add_argument("--unknown", choices=UNKNOWN_POLICIES, default="skip",
+                        help="Skip symbols not in the cypher, stop with an error, or use --replacement.")
+    parser.add_argument("--replacement", default=None, help="Cypher symbol used for unknown symbols.")
+
+def handler_options(parser, args):
+    """Check the shared options and return them as handler settings.
+
+    Only the options the command declared are included; invalid values
+    exit through parser.error.
+    """
+    try:
+        root_note = parse_root_note(args.root_note)
+    except ValueError as e:
+        parser.error(str(e))
+    options = {"cypher": args.cypher, "root_note": root_note}
+    if hasattr(args, "keyword"):
+        options["keyword"] = args.keyword
+        options["keyword_file"] = args.keyword_file
+    if hasattr(args, "chord_size"):
+        if hasattr(args, "tracks"):
+            if args.chord_size < 1 or args.tracks < 1:
+                parser.error("--chord-size and --tracks must be at least 1")
+        elif args.chord_size < 1:
+            parser.error("--chord-size must be at least 1")
+        if args.unknown == "replace" and not args.replacement:
+            parser.error("--unknown replace needs --replacement")
+        options.update(
+            note_on_time=args.note_on_time,
+            note_off_time=args.note_off_time,
+            chord_size=args.chord_size,
+            tracks=getattr(args, "tracks", 1),
+            unknown=args.unknown,
+            replacement=args.replacement,
+        )
+    return options
@@ -0,0 +1,253 @@
+"""Asynchronous encrypt/decrypt service over TCP or Unix sockets."""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .cypher import CYPHER_CACHE, Alphabet, parse_root_note
+from .midi import MIDIEncoder, MIDIParseError, SMFNoteReader, mido_notes
+from .vigenere import VigenereTable
+
+class CypherService:
+    """Encrypt/decrypt core for the network service.
+
+    Unlike the interactive handlers there is no shared mutable state: every
+    request names its own cypher file, keyword, root note and MIDI settings.
+    Cypher files are resolved inside cypher_dir and come from the shared
+    CypherCache; Vigenere tables are kept per alphabet.
+    """
+    MAX_TABLES = 64
+
+    def __init__(self, cypher_dir=".", cypher_cache=None):
+        self.cypher_dir = os.path.abspath(cypher_dir)
+        self.cypher_cache = CYPHER_CACHE if cypher_cache is None else cypher_cache
+        self._tables = {}
+
+    def _cypher(self, request):
+        name = request.get("cypher") or "default_cypher.txt"
+        path = os.path.abspath(os.path.join(self.cypher_dir, name))
+        if os.path.commonpath([path, self.cypher_dir]) != self.cypher_dir:
+            raise ValueError(f"Cypher file '{name}' is outside the cypher directory.")
+        cached = self.cypher_cache.load_scale(path)
+        if not cached.scale:
+            raise ValueError(f"Cypher file '{name}' is empty.")
+        return cached.scale, cached.cypher_map(parse_root_note(request.get("root_note", 60)))
+
+    def _table(self, scale):
+        alphabet = Alphabet.upper_case(scale)
+        table = self._tables.get(alphabet)
+        if table is None:
+            if len(self._tables) >= self.MAX_TABLES:
+                self._tables.clear()
+            table = self._tables[alphabet] = VigenereTable(alphabet)
+        return table
+
+    @staticmethod
+    def _encoder(request):
+        return MIDIEncoder(
+            int(request.get("note_on_time", 0)), int(request.get("note_off_time", 480)),
+            int(request.get("chord_size", 1)), int(request.get("tracks", 1)),
+        )
+
+    def encrypt(self, request):
+        """Encrypt request["text"] and return the MIDI file base64-encoded."""
+        text = request["text"]
+        scale, cypher_map = self._cypher(request)
+        keyword = request.get("keyword", "").upper()
+        if keyword:
+            text = self._table(scale).transform(text.upper().replace(" ", ""), keyword)
+        notes = cypher_map.encode(text, request.get("unknown", "skip"), request.get("replacement"))
+        midi = self._encoder(request).encode(notes)
+        return {"midi": base64.b64encode(midi).decode('ascii'), "notes": len(notes)}
+
+    def decrypt(self, request):
+        """Decrypt the base64-encoded MIDI file in request["midi"] and return the text."""
+        data = base64.b64decode(request["midi"])
+        scale, cypher_map = self._cypher(request)
+        try:
+            notes = list(SMFNoteReader.iter_bytes_notes(data))
+        except MIDIParseError:
+            notes = mido_notes(file=io.BytesIO(data))
+        text = cypher_map.decode(notes)
+        keyword = request.get("keyword", "").upper()
+        if keyword:
+            text = self._table(scale).transform(text.upper().replace(" ", ""), keyword, decrypt=True)
+        return {"text": text, "notes": len(notes)}
+
+_service = None
+
+def _run_service_request(cypher_dir, op, request):
+    """Executor entry point; keeps one CypherService per worker.
+
+    Returns the result with the worker's pid and its cypher cache counters.
+    """
+    global _service
+    if _service is None or _service.cypher_dir != os.path.abspath(cypher_dir):
+        _service = CypherService(cypher_dir)
+    return getattr(_service, op)(request), os.getpid(), _service.cypher_cache.stats()
+
+class CypherServer:
+    """Asyncio front-end serving CypherService over TCP or a Unix socket.
+
+    The protocol is one JSON object per line in each direction. Requests have
+    an "op" of "encrypt" (with "text"), "decrypt" (with base64 "midi") or
+    "stats", plus optional "id", "cypher", "keyword", "root_note",
+    "note_on_time", "note_off_time", "chord_size", "tracks", "unknown" and
+    "replacement". Responses echo
+    the id and carry "ok" and either the result fields or "error".
+
+    The "stats" reply also sums the cypher cache counters each worker reported
+    with its latest request.
+
+    Work runs on the executor. At most max_inflight requests run at once and
+    requests beyond max_pending are refused with a "server busy" error. Each
+    connection is served one request at a time, so a client that stops
+    reading stops being read from.
+    """
+    OPS = ("encrypt", "decrypt")
+
+    def __init__(self, executor, cypher_dir=".", max_inflight=None, max_pending=None,
+                 max_request_size=64 * 1024 * 1024, latency_window=10000):
+        self.executor = executor
+        self.cypher_dir = cypher_dir
+        self.max_inflight = max_inflight or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_inflight * 4
+        self.max_request_size = max_request_size
+        self.pending = 0
+        self.rejected = 0
+        self.latencies = {op: deque(maxlen=latency_window) for op in self.OPS}
+        self.cache_stats = {}
+        self._semaphore = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        if path:
+            self._server = await asyncio.start_unix_server(self.handle_client, path, limit=self.max_request_size)
+        else:
+            self._server = await asyncio.start_server(self.handle_client, host, port, limit=self.max_request_size)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def stats(self):
+        """Latency percentiles in milliseconds per operation, plus load counters."""
+        report = {"pending": self.pending, "rejected": self.rejected}
+        for op, samples in self.latencies.items():
+            ordered = sorted(samples)
+            entry = {"count": len(ordered)}
+            for percentile in (50, 90, 99):
+                if ordered:
+                    index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+                    entry[f"p{percentile}_ms"] = ordered[index] * 1000
+            report[op] = entry
+        report["cypher_cache"] = {
+            key: sum(stats[key] for stats in self.cache_stats.values())
+            for key in ("hits", "misses", "invalidations", "evictions", "size")
+        }
+        return report
+
+    async def handle_request(self, request):
+        op = request.get("op")
+        if op == "stats":
+            return self.stats()
+        if op not in self.OPS:
+            raise ValueError(f"Unknown op: {op!r}")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise RuntimeError("server busy")
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                result, pid, cache_stats = await loop.run_in_executor(
+                    self.executor, _run_service_request, self.cypher_dir, op, request)
+        finally:
+            self.pending -= 1
+        self.latencies[op].append(time.perf_counter() - start)
+        # Workers in one process share their cache, so key the counters by pid
+        self.cache_stats[pid] = cache_stats
+        return result
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b'{"ok": false, "error": "request too large"}\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                    response = {"id": request_id, "ok": True, **await self.handle_request(request)}
+                except Exception as e:
+                    response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def service_request(request, host="127.0.0.1", port=8765, path=None):
+    """Send one request to a running CypherServer and return the decoded response."""
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path, limit=64 * 1024 * 1024)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=64 * 1024 * 1024)
+    try:
+        writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def serve_main(argv):
+    """Entry point for ``DE-CRYPT_4.7.py serve [options]``."""
+    parser = argparse.ArgumentParser(prog="DE-CRYPT_4.7.py serve", description="Serve encrypt/decrypt requests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument("--cypher-dir", default=".", help="Directory requests may load cypher files from.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--max-pending", type=int, default=None, help="Requests queued before refusing new ones.")
+    args = parser.parse_args(argv)
+
+    async def run():
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            server = CypherServer(executor, args.cypher_dir, args.workers, args.max_pending)
+            await server.start(args.host, args.port, args.unix)
+            print(f"Serving on {args.unix or f'{args.host}:{args.port}'}")
+            stop = asyncio.Event()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            try:
+                await stop.wait()
+            finally:
+                await server.close()
+                print(json.dumps(server.stats(), indent=2))
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,113 @@
+"""File helpers shared by the handlers and the batch commands."""
+import contextlib
+import glob
+import mmap
+import os
+import random
+import re
+
+from .instrumentation import INSTRUMENTATION
+
+class Utils:
+    MAX_FILENAME_LENGTH = 32
+    CHUNK_SIZE = 1 << 20
+    # Bytes that stop a text file from being processed byte for byte: non-ASCII
+    # characters, and \r, which text mode folds into \n
+    NOT_PLAIN_ASCII = re.compile(rb'[\r\x80-\xff]')
+
+    @staticmethod
+    def truncate_filename(filename, extension):
+        base_length = Utils.MAX_FILENAME_LENGTH - len(extension)
+        return (filename[:base_length] if len(filename) > base_length else filename) + extension
+
+    @staticmethod
+    def get_sequential_filename(base_name, extension):
+        if not os.path.exists(f"{base_name}{extension}"):
+            return f"{base_name}{extension}"
+        counter = 1
+        while os.path.exists(f"{base_name}_{counter}{extension}"):
+            counter += 1
+        return f"{base_name}_{counter}{extension}"
+
+    @staticmethod
+    def generate_random_string(length, valid_chars, rng=random):
+        return ''.join(rng.choices(valid_chars, k=length))
+
+    @staticmethod
+    def iter_text_from_file(filepath, chunk_size=CHUNK_SIZE):
+        """Yield the contents of a text file in chunks of at most chunk_size characters."""
+        with open(filepath, 'r') as file:
+            while True:
+                with INSTRUMENTATION.stage("read") as stage:
+                    chunk = file.read(chunk_size)
+                    stage.units = len(chunk)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    @contextlib.contextmanager
+    def map_text_file(filepath):
+        """Memory-map a file read-only for byte-level processing (b'' if it is empty)."""
+        with open(filepath, 'rb') as file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                yield b''
+                return
+            with data:
+                yield data
+
+    @staticmethod
+    def release_mapped(data, start, end):
+        """Drop pages of a mapped file that have been processed from this process's resident set."""
+        if isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+            start -= start % mmap.PAGESIZE
+            data.madvise(mmap.MADV_DONTNEED, start, min(end, len(data)) - start)
+
+    @staticmethod
+    def is_plain_ascii(data, chunk_size=CHUNK_SIZE):
+        """True if data reads the same as bytes and as text: ASCII with no carriage returns."""
+        for start in range(0, len(data), chunk_size):
+            found = Utils.NOT_PLAIN_ASCII.search(data, start, start + chunk_size)
+            Utils.release_mapped(data, start, start + chunk_size)
+            if found:
+                return False
+        return True
+
+    @staticmethod
+    def iter_mapped_chunks(data, chunk_size=CHUNK_SIZE):
+        """Yield a mapped file in chunks of at most chunk_size bytes, releasing each one as it is read."""
+        for start in range(0, len(data), chunk_size):
+            with INSTRUMENTATION.stage("read") as stage:
+                chunk = data[start:start + chunk_size]
+                Utils.release_mapped(data, start, start + chunk_size)
+                stage.units = len(chunk)
+            yield chunk
+
+    @staticmethod
+    def read_text_from_file(filepath):
+        try:
+            with INSTRUMENTATION.stage("read") as stage, open(filepath, 'r') as file:
+                text = file.read()
+                stage.units = len(text)
+                return text
+        except FileNotFoundError:
+            INSTRUMENTATION.emit("read_error", f"Error: File '{filepath}' not found.", level="error", filename=filepath)
+            return ""
+        except Exception as e:
+            INSTRUMENTATION.emit("read_error", f"Error reading file '{filepath}': {e}", level="error", filename=filepath)
+
+def collect_batch_inputs(patterns, mode):
+    """Expand directories and glob patterns into a sorted, de-duplicated file list."""
+    extensions = (".txt",) if mode == "encrypt" else (".mid", ".midi")
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(extensions)
+            )
+        else:
+            files.extend(glob.glob(pattern))
+    return sorted({path for path in files if os.path.isfile(path)})
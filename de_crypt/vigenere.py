@@ -0,0 +1,421 @@
+"""The Vigenere cypher over a configurable alphabet."""
+import os
+import sys
+
+from .cypher import _ARRAY_TABLE_SIZE, Alphabet
+from .instrumentation import INSTRUMENTATION
+
+# Letter frequencies of English text in percent
+ENGLISH_FREQUENCIES = {
+    'A': 8.2, 'B': 1.5, 'C': 2.8, 'D': 4.3, 'E': 12.7, 'F': 2.2, 'G': 2.0, 'H': 6.1, 'I': 7.0,
+    'J': 0.15, 'K': 0.77, 'L': 4.0, 'M': 2.4, 'N': 6.7, 'O': 7.5, 'P': 1.9, 'Q': 0.095, 'R': 6.0,
+    'S': 6.3, 'T': 9.1, 'U': 2.8, 'V': 0.98, 'W': 2.4, 'X': 0.15, 'Y': 2.0, 'Z': 0.074,
+}
+
+class VigenereTable:
+    """Precomputed Vigenere lookup tables for a single alphabet.
+
+    Characters are resolved through the alphabet's symbol->index map instead
+    of scanning it, and each keyword character gets a ``str.translate`` table,
+    an array indexed by code point for alphabets of small code points, so a
+    whole key column is processed in one call. Alphabets with multi-character
+    symbols are split into symbols first and shifted symbol by symbol.
+    """
+
+    def __init__(self, alphabet):
+        self.symbols = alphabet if isinstance(alphabet, Alphabet) else Alphabet(alphabet)
+        self.alphabet = self.symbols.text
+        self.size = len(self.symbols)
+        self.index = self.symbols.index
+        top = max(map(ord, self.index), default=0) if self.symbols.simple else 0
+        # Characters past the end of an array table are left as they are, like missing dict keys
+        self._array_size = max(256, top + 1) if top < _ARRAY_TABLE_SIZE else None
+        self._encrypt_rows = {}
+        self._decrypt_rows = {}
+
+    def _row_table(self, shifts):
+        if not self.symbols.simple:
+            return shifts
+        if self._array_size is None:
+            return {ord(symbol): shifted for symbol, shifted in shifts.items()}
+        table = [chr(i) for i in range(self._array_size)]
+        for symbol, shifted in shifts.items():
+            table[ord(symbol)] = shifted
+        return table
+
+    def encrypt_row(self, row):
+        """Translate table shifting every alphabet symbol forward by ``row``."""
+        table = self._encrypt_rows.get(row)
+        if table is None:
+            symbols = self.symbols
+            table = self._row_table({
+                symbol: symbols[(row + i) % self.size]
+                for symbol, i in self.index.items()
+            })
+            self._encrypt_rows[row] = table
+        return table
+
+    def decrypt_row(self, row):
+        """Translate table shifting every alphabet symbol back by ``row``."""
+        table = self._decrypt_rows.get(row)
+        if table is None:
+            shifts = {}
+            for i in range(self.size):
+                shifts.setdefault(self.symbols[(row + i) % self.size], self.symbols[i])
+            table = self._decrypt_rows[row] = self._row_table(shifts)
+        return table
+
+    def key_length(self, text):
+        """Number of key positions text takes up: its characters, or its symbols."""
+        return len(text) if self.symbols.simple else len(self.symbols.tokenize(text))
+
+    def transform(self, text, keyword, decrypt=False, offset=0):
+        """Apply the cipher to already normalised text.
+
+        ``offset`` is the key position of the first character, so a long text
+        can be processed in pieces by passing the running key_length.
+        """
+        keyword = self.symbols.tokenize(keyword)
+        period = len(keyword)
+        if not text or not period:
+            return text
+        row_table = self.decrypt_row if decrypt else self.encrypt_row
+        tables = []
+        for k in keyword:
+            row = self.index.get(k)
+            tables.append(None if row is None else row_table(row))
+
+        if not self.symbols.simple:
+            return self._transform_symbols(self.symbols.tokenize(text), keyword, tables, offset)
+        if period == 1 and tables[0] is not None:
+            return text.translate(tables[0])
+
+        # Reassemble the columns as UTF-32 code units rather than through a
+        # list holding one string object per character
+        output = bytearray(4 * len(text))
+        stride = 4 * period
+        for r in range(min(period, len(text))):
+            table = tables[(offset + r) % period]
+            column = text[r::period]
+            if table is None:
+                self._check_column(column, keyword[(offset + r) % period])
+            else:
+                column = column.translate(table)
+            column = column.encode('utf-32-le', 'surrogatepass')
+            for byte in range(4):
+                output[4 * r + byte::stride] = column[byte::4]
+        return output.decode('utf-32-le', 'surrogatepass')
+
+    def _transform_symbols(self, symbols, keyword, tables, offset):
+        period = len(keyword)
+        for r in range(min(period, len(symbols))):
+            table = tables[(offset + r) % period]
+            column = symbols[r::period]
+            if table is None:
+                self._check_column(column, keyword[(offset + r) % period])
+                continue
+            symbols[r::period] = [table.get(symbol, symbol) for symbol in column]
+        return ''.join(symbols)
+
+    def _check_column(self, column, key):
+        if any(symbol in self.index for symbol in column):
+            raise ValueError(f"Keyword character '{key}' is not in the alphabet.")
+
+# Tables built by each pool worker, by alphabet
+_worker_tables = {}
+
+def _attach_shared(name):
+    """Open a shared memory block the parent created, without registering it with the resource tracker.
+
+    A worker with its own tracker would otherwise report the block as leaked
+    and try to unlink it again after the parent has. Unregistering after
+    attaching isn't safe either: a worker sharing the parent's tracker would
+    drop the parent's registration. Python 3.13 has track=False for this.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+def _transform_shared_chunk(name, encoding, width, start, end, alphabet, keyword, decrypt, offset):
+    """Apply the cipher in place to characters start:end of a shared memory block, in a pool worker."""
+    table = _worker_tables.get(alphabet)
+    if table is None:
+        if len(_worker_tables) >= 8:
+            _worker_tables.clear()
+        table = _worker_tables[alphabet] = VigenereTable(alphabet)
+    shm = _attach_shared(name)
+    try:
+        view = shm.buf[start * width:end * width]
+        try:
+            text = table.transform(str(view, encoding, 'surrogatepass'), keyword, decrypt, offset + start)
+            view[:] = text.encode(encoding, 'surrogatepass')
+        finally:
+            view.release()
+    finally:
+        shm.close()
+    return end - start
+
+class ParallelVigenere:
+    """Vigenere for very large texts, split across a process pool.
+
+    The key position of a character is its offset modulo the keyword length,
+    so the text is cut into chunks that workers transform independently, each
+    starting at its own key phase. The text is copied once into a shared
+    memory block instead of being pickled to the workers, every worker writes
+    its chunk back in place, and the block is read back in order at the end.
+    Texts shorter than ``min_size`` and alphabets with multi-character
+    symbols, whose output can change length, are transformed in this process.
+    The pool is started on first use and kept until close().
+    """
+    MIN_SIZE = 1 << 20
+    MIN_CHUNK = 1 << 16
+
+    def __init__(self, workers=None, min_size=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.min_size = self.MIN_SIZE if min_size is None else min_size
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def transform(self, table, text, keyword, decrypt=False, offset=0):
+        """VigenereTable.transform, run across the pool when the text is large enough."""
+        size = len(text)
+        if self.workers == 1 or size < max(1, self.min_size) or not keyword or not table.symbols.simple:
+            return table.transform(text, keyword, decrypt, offset)
+        # One byte per character when the text and every shifted character fit in Latin-1
+        encoding, width = 'latin-1', 1
+        try:
+            table.alphabet.encode(encoding)
+            data = text.encode(encoding)
+        except UnicodeEncodeError:
+            encoding, width = 'utf-32-le', 4
+            data = text.encode(encoding, 'surrogatepass')
+
+        from multiprocessing.shared_memory import SharedMemory
+        shm = SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            del data
+            chunk = max(self.MIN_CHUNK, -(-size // (2 * self.workers)))
+            starts = range(0, size, chunk)
+            count = len(starts)
+            for _ in self._get_executor().map(
+                _transform_shared_chunk, [shm.name] * count, [encoding] * count, [width] * count, starts,
+                [min(start + chunk, size) for start in starts], [table.alphabet] * count, [keyword] * count,
+                [decrypt] * count, [offset] * count,
+            ):
+                pass
+            return str(shm.buf[:size * width], encoding, 'surrogatepass')
+        finally:
+            shm.close()
+            shm.unlink()
+
+class VigenereCipher:
+    def __init__(self, alphabet_manager, workers=1):
+        self.alphabet_manager = alphabet_manager
+        self._table = None
+        self._square = None
+        self.parallel = None
+        self.set_workers(workers)
+
+    @property
+    def alphabet(self):
+        return self.alphabet_manager.get_alphabet()
+
+    @property
+    def vigenere_square(self):
+        """The full square for the alphabet, built on first use."""
+        if self._square is None:
+            self._square = self.generate_vigenere_square()
+        return self._square
+
+    def generate_vigenere_square(self):
+        return [
+            self.alphabet[i:] + self.alphabet[:i]
+            for i in range(len(self.alphabet))
+        ]
+
+    def get_table(self):
+        """Return the lookup tables for the current alphabet, rebuilding only when it changed."""
+        symbols = self.alphabet_manager.get_symbols()
+        if self._table is None or self._table.symbols != symbols:
+            self._table = VigenereTable(symbols)
+        return self._table
+
+    def key_length(self, text):
+        """Number of key positions normalised text takes up in the current alphabet."""
+        return self.get_table().key_length(text)
+
+    def _transform(self, text, keyword, decrypt, offset):
+        table = self.get_table()
+        if self.parallel is not None:
+            return self.parallel.transform(table, text, keyword, decrypt, offset)
+        return table.transform(text, keyword, decrypt, offset)
+
+    def set_workers(self, workers):
+        """Use workers processes for texts of at least ParallelVigenere.MIN_SIZE characters.
+
+        1 keeps everything in this process; 0 or None uses every core.
+        """
+        self.close()
+        self.workers = workers
+        self.parallel = None if workers == 1 else ParallelVigenere(workers)
+
+    def close(self):
+        """Stop the worker pool of a parallel cipher, if it was started."""
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def encrypt(self, plaintext, keyword, offset=0):
+        """Encrypt the plaintext using the current alphabet and keyword."""
+        with INSTRUMENTATION.stage("vigenere", len(plaintext)):
+            plaintext = plaintext.upper().replace(" ", "")
+            return self._transform(plaintext, keyword.upper(), False, offset)
+
+    def encrypt_chunks(self, chunks, keyword):
+        """Encrypt an iterable of text chunks, carrying the key position across them."""
+        table = self.get_table()
+        if not table.symbols.simple:
+            # Normalise first so symbols that only form once spaces are gone aren't split
+            chunks = table.symbols.rechunk(chunk.upper().replace(" ", "") for chunk in chunks)
+        offset = 0
+        for chunk in chunks:
+            chunk = self.encrypt(chunk, keyword, offset)
+            offset += table.key_length(chunk)
+            yield chunk
+
+    def decrypt(self, ciphertext, keyword, offset=0):
+        """Decrypt the ciphertext using the current alphabet and keyword."""
+        with INSTRUMENTATION.stage("vigenere", len(ciphertext)):
+            ciphertext = ciphertext.upper().replace(" ", "")
+            return self._transform(ciphertext, keyword.upper(), True, offset)
+
+    def update_vigenere_square(self):
+        """Regenerate the Vigenere square based on the current alphabet."""
+        self._square = None
+
+class ByteCipher:
+    """Byte-level Vigenere and note mapping for plain ASCII text.
+
+    Works on bytes chunks with bytes.translate: upper-casing and space
+    stripping are one translate, and each key column is shifted and mapped to
+    its notes by a single fused 256-entry table, so no intermediate strings or
+    per-character lists are built. Output matches VigenereCipher followed by
+    CypherMap exactly; create() returns None for cyphers and alphabets that
+    don't fit in single bytes.
+    """
+    UNMAPPED = 0xFF
+    UPPER = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+    def __init__(self, table, keyword, encrypt_tables, decode_table, decode_delete):
+        self.table = table
+        self.keyword = keyword
+        self._encrypt_tables = encrypt_tables
+        self._unmapped = bytes(byte for byte in range(256) if encrypt_tables[0][byte] == self.UNMAPPED)
+        self._decode_table = decode_table
+        self._decode_delete = decode_delete
+        self._alphabet = table.alphabet.encode('ascii') if keyword else b''
+        self._decrypt_tables = None
+
+    @classmethod
+    def create(cls, cypher_map, table=None, keyword=""):
+        keyword = keyword.upper() if table else ""
+        if not cypher_map.symbols.simple or (keyword and not (table.symbols.simple and table.alphabet.isascii())):
+            return None
+        encrypt_tables = []
+        for char in (keyword or [None]):
+            row = table.index.get(char) if char else None
+            # Row tables of ASCII alphabets are arrays covering every byte
+            shift = table.encrypt_row(row) if row is not None else [chr(byte) for byte in range(256)]
+            fused = bytearray([cls.UNMAPPED]) * 256
+            for byte in range(128):
+                note = cypher_map.char_to_note.get(shift[byte].upper())
+                if note is not None:
+                    if not 0 <= note < cls.UNMAPPED:
+                        return None
+                    fused[byte] = note
+            encrypt_tables.append(bytes(fused))
+
+        decode_table = bytearray(256)
+        decode_delete = bytearray()
+        for note in range(256):
+            char = cypher_map.note_to_char[note] if note < 128 else None
+            if char is not None and keyword:
+                char = char.upper()
+            if char is None or (keyword and char == " "):
+                decode_delete.append(note)
+            elif len(char) != 1 or not char.isascii():
+                return None
+            else:
+                decode_table[note] = ord(char)
+        return cls(table, keyword, encrypt_tables, bytes(decode_table), bytes(decode_delete))
+
+    def _check_column(self, column, position):
+        # Same error as VigenereTable.transform for a keyword character outside the alphabet
+        if len(column.translate(None, self._alphabet)) != len(column):
+            raise ValueError(f"Keyword character '{self.keyword[position]}' is not in the alphabet.")
+
+    def encrypt(self, data, offset=0):
+        """Return the notes for a chunk of ASCII text as bytes, and the chunk's key length.
+
+        ``offset`` is the key position of the chunk's first character; the key
+        length is the character count after spaces are removed.
+        """
+        if not self.keyword:
+            return bytes(data).translate(self.UPPER).translate(self._encrypt_tables[0], self._unmapped), 0
+        text = bytes(data).translate(self.UPPER, b' ')
+        period = len(self.keyword)
+        notes = bytearray(len(text))
+        for r in range(min(period, len(text))):
+            position = (offset + r) % period
+            column = text[r::period]
+            if self.table.index.get(self.keyword[position]) is None:
+                self._check_column(column, position)
+            notes[r::period] = column.translate(self._encrypt_tables[position])
+        return notes.translate(None, bytes((self.UNMAPPED,))), len(text)
+
+    def decrypt(self, notes, offset=0):
+        """Return the ASCII text for a chunk of notes, undoing the keyword if there is one."""
+        text = bytes(notes).translate(self._decode_table, self._decode_delete)
+        period = len(self.keyword)
+        if not period or not text:
+            return text
+        if self._decrypt_tables is None:
+            self._decrypt_tables = []
+            for char in self.keyword:
+                row = self.table.index.get(char)
+                shift = self.table.decrypt_row(row) if row is not None else None
+                self._decrypt_tables.append(
+                    None if shift is None else bytes(ord(shift[byte]) for byte in range(256))
+                )
+        output = bytearray(text)
+        for r in range(min(period, len(text))):
+            position = (offset + r) % period
+            column = text[r::period]
+            if self._decrypt_tables[position] is None:
+                self._check_column(column, position)
+                continue
+            output[r::period] = column.translate(self._decrypt_tables[position])
+        return output
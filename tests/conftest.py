@@ -0,0 +1,45 @@
+"""Fixtures shared by the test modules."""
+import string
+
+import pytest
+
+from de_crypt.cypher import AlphabetManager, CypherHandler
+from de_crypt.midi import MIDIHandler
+from de_crypt.vigenere import VigenereCipher
+
+def _write_cypher(path, symbols):
+    path.write_text("".join(f"{symbol}: {i}\n" for i, symbol in enumerate(symbols)), encoding='utf-8')
+    return path
+
+@pytest.fixture
+def ch_symbols():
+    """A-Z with C replaced by CH.
+
+    C only appears as part of CH, so any text, ciphertext or chunk of one
+    splits into symbols one way.
+    """
+    return [letter if letter != "C" else "CH" for letter in string.ascii_uppercase]
+
+@pytest.fixture
+def cypher_file(tmp_path):
+    """A cypher file mapping A-Z to intervals 0-25."""
+    return _write_cypher(tmp_path / "cypher.txt", string.ascii_uppercase)
+
+@pytest.fixture
+def make_handlers(tmp_path):
+    """Factory for (cypher_handler, midi_handler, vigenere_cipher) over a cypher of the given symbols."""
+    def make(symbols=string.ascii_uppercase, chord_size=1, tracks=1):
+        cypher = _write_cypher(tmp_path / "cypher.txt", symbols)
+        alphabet_manager = AlphabetManager()
+        cypher_handler = CypherHandler(alphabet_manager, str(cypher), 40, str(tmp_path / "keyword.txt"))
+        midi_handler = MIDIHandler(cypher_handler, alphabet_manager, chord_size=chord_size, tracks=tracks)
+        return cypher_handler, midi_handler, VigenereCipher(alphabet_manager)
+    return make
+
+@pytest.fixture
+def midi_handler(tmp_path):
+    """A MIDIHandler with no cypher loaded."""
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, str(tmp_path / "none.txt"), keyword_file=str(tmp_path / "k"))
+    cypher_handler.scale = {}
+    return MIDIHandler(cypher_handler, alphabet_manager)
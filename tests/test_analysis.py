@@ -0,0 +1,44 @@
+"""Tests for Vigenere keyword recovery."""
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from de_crypt.analysis import VigenereAnalyzer
+from de_crypt.cypher import Alphabet
+from de_crypt.vigenere import VigenereTable
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while the other animals watch from the edge of the field "
+    "music is written in notes and every note has a pitch that the listener can hear in the melody "
+    "a message hidden in a song travels far because nobody thinks to read the score for secret letters "
+    "which chapter of the book describes how each character changes as the story reaches its end"
+).split()
+
+def _english(length, seed=1):
+    rng = random.Random(seed)
+    text = ""
+    while len(text) < length:
+        text += rng.choice(WORDS)
+    return text.upper()
+
+def test_recover_keyword():
+    plaintext = _english(4000)
+    table = VigenereTable("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    result = VigenereAnalyzer(table.symbols, workers=1).analyze(table.transform(plaintext, "MELODY"))
+    assert result["keyword"] == "MELODY"
+    assert result["plaintext"] == plaintext
+
+def test_recover_keyword_with_multi_character_symbols(ch_symbols):
+    alphabet = Alphabet(ch_symbols)
+    plaintext = _english(4000).replace("C", "CH")
+    reference = _english(4000, seed=2).replace("C", "CH")
+    table = VigenereTable(alphabet)
+    ciphertext = table.transform(plaintext, "CHORD")
+    analyzer = VigenereAnalyzer(alphabet, reference, workers=1)
+    assert analyzer.size == 26
+    assert len(analyzer.encode(ciphertext)) == len(alphabet.tokenize(ciphertext))
+    result = analyzer.analyze(ciphertext)
+    assert result["keyword"] == "CHORD"
+    assert result["plaintext"] == plaintext
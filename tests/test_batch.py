@@ -0,0 +1,49 @@
+"""Tests for the batch encrypt, decrypt and generate commands."""
+from de_crypt.batch import _init_batch_worker, _run_batch_job, batch_main, generate_main
+from de_crypt.instrumentation import INSTRUMENTATION
+
+def _options(tmp_path, cypher):
+    return {
+        "cypher": str(cypher), "keyword": "", "keyword_file": str(tmp_path / "k"), "root_note": 60,
+        "note_on_time": 0, "note_off_time": 480, "chord_size": 1, "tracks": 1, "chunk_size": 1 << 20,
+    }
+
+def test_batch_round_trip(tmp_path, cypher_file):
+    (tmp_path / "in.txt").write_text("hello world", encoding='utf-8')
+    common = ["-c", str(cypher_file), "-k", "KEY", "-j", "1"]
+    assert batch_main(["encrypt", str(tmp_path / "in.txt"), "-o", str(tmp_path / "mid")] + common) == 0
+    assert batch_main(["decrypt", str(tmp_path / "mid"), "-o", str(tmp_path / "txt")] + common) == 0
+    assert (tmp_path / "txt" / "in.txt").read_text(encoding='utf-8') == "HELLOWORLD"
+
+def test_batch_without_cypher_fails_before_writing(tmp_path, capsys):
+    (tmp_path / "in.txt").write_text("hello", encoding='utf-8')
+    output_dir = tmp_path / "out"
+    argv = ["encrypt", str(tmp_path / "in.txt"), "-c", str(tmp_path / "nope.txt"), "-o", str(output_dir), "-j", "1"]
+    assert batch_main(argv) == 1
+    assert "no cypher could be loaded" in capsys.readouterr().out
+    assert not output_dir.exists()
+
+def test_worker_reports_missing_cypher(tmp_path, monkeypatch):
+    # The worker initializer turns console output off for the process it runs in
+    monkeypatch.setattr(INSTRUMENTATION, "console", INSTRUMENTATION.console)
+    monkeypatch.setattr(INSTRUMENTATION, "enabled", INSTRUMENTATION.enabled)
+    (tmp_path / "in.txt").write_text("hello", encoding='utf-8')
+    _init_batch_worker(_options(tmp_path, tmp_path / "nope.txt"))
+    result = _run_batch_job(("encrypt", str(tmp_path / "in.txt"), str(tmp_path / "out.mid")))
+    assert "no cypher could be loaded" in result["error"]
+    assert not (tmp_path / "out.mid").exists()
+
+def test_generate_is_reproducible(tmp_path, cypher_file):
+    argv = ["3", "20", "-c", str(cypher_file), "-m", "HELLO", "-s", "7", "-j", "1", "-k", ""]
+    assert generate_main(argv + ["-o", str(tmp_path / "a")]) == 0
+    assert generate_main(argv + ["-o", str(tmp_path / "b")]) == 0
+    names = sorted(path.name for path in (tmp_path / "a").iterdir())
+    assert names == ["generated_000000.mid", "generated_000001.mid", "generated_000002.mid"]
+    for name in names:
+        assert (tmp_path / "a" / name).read_bytes() == (tmp_path / "b" / name).read_bytes()
+
+def test_generate_without_cypher_fails(tmp_path, capsys):
+    output_dir = tmp_path / "out"
+    assert generate_main(["2", "10", "-c", str(tmp_path / "nope.txt"), "-o", str(output_dir), "-j", "1"]) == 1
+    assert "no cypher could be loaded" in capsys.readouterr().out
+    assert not output_dir.exists()
@@ -0,0 +1,56 @@
+"""Tests for CypherHandler loading."""
+import os
+
+from de_crypt.cypher import AlphabetManager, CypherCache, CypherHandler
+
+def test_load_scale_from_file_before_deferred_load(tmp_path, capsys):
+    # Changing the cypher file before the first one was loaded, as menu option 3 does
+    cypher = tmp_path / "cypher.txt"
+    cypher.write_text("A: 0\nB: 1\nC: 2\n", encoding='utf-8')
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, str(tmp_path / "missing.txt"), keyword_file=str(tmp_path / "k"))
+    cypher_handler.filename = str(cypher)
+    cypher_handler.scale = cypher_handler.load_scale_from_file()
+
+    output = capsys.readouterr().out
+    assert output.count("Cypher loaded successfully") == 1
+    assert output.count("Library updated") == 1
+    assert "not found" not in output
+    assert cypher_handler.scale == {"A": 0, "B": 1, "C": 2}
+    assert alphabet_manager.get_alphabet() == "ABC"
+
+def test_changed_file_invalidates_cache_entry(tmp_path):
+    cypher = tmp_path / "cypher.txt"
+    cypher.write_text("A: 0\nB: 1\n", encoding='utf-8')
+    cache = CypherCache()
+    first = cache.load_scale(str(cypher))
+    assert cache.load_scale(str(cypher)) is first
+    # Same size, later mtime
+    cypher.write_text("A: 1\nB: 0\n", encoding='utf-8')
+    stat = os.stat(cypher)
+    os.utime(cypher, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.load_scale(str(cypher)).scale == {"A": 1, "B": 0}
+    # Different size, mtime put back to what it was
+    stat = os.stat(cypher)
+    cypher.write_text("A: 1\nB: 0\nC: 2\n", encoding='utf-8')
+    os.utime(cypher, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load_scale(str(cypher)).scale == {"A": 1, "B": 0, "C": 2}
+    assert cache.stats() == {"hits": 1, "misses": 3, "invalidations": 2, "evictions": 0, "size": 1, "maxsize": 64}
+
+def test_reload_if_changed(tmp_path):
+    cypher = tmp_path / "cypher.txt"
+    keyword = tmp_path / "keyword.txt"
+    cypher.write_text("A: 0\nB: 1\n", encoding='utf-8')
+    keyword.write_text("KEY", encoding='utf-8')
+    alphabet_manager = AlphabetManager()
+    cypher_handler = CypherHandler(alphabet_manager, str(cypher), keyword_file=str(keyword), cypher_cache=CypherCache())
+    assert not cypher_handler.reload_if_changed()
+    assert cypher_handler.scale == {"A": 0, "B": 1}
+    assert cypher_handler.keyword == "KEY"
+    assert not cypher_handler.reload_if_changed()
+    cypher.write_text("A: 0\nB: 1\nC: 2\n", encoding='utf-8')
+    keyword.write_text("LONGER", encoding='utf-8')
+    assert cypher_handler.reload_if_changed()
+    assert cypher_handler.scale == {"A": 0, "B": 1, "C": 2}
+    assert alphabet_manager.get_alphabet() == "ABC"
+    assert cypher_handler.keyword == "LONGER"
@@ -0,0 +1,59 @@
+"""Tests for deriving cypher maps from MIDI files."""
+from de_crypt.batch import derive_main
+from de_crypt.cypher import Alphabet
+from de_crypt.midi import MIDIHandler
+
+def test_create_cypher_from_unreadable_midi_writes_nothing(tmp_path, midi_handler, capsys):
+    bad = tmp_path / "bad.mid"
+    bad.write_bytes(b'')
+    output = tmp_path / "cypher.txt"
+    midi_handler.create_cypher_from_midi(str(bad), str(output), workers=1)
+    printed = capsys.readouterr().out
+    assert not output.exists()
+    assert "Cypher created" not in printed
+    assert "Error" in printed
+
+def test_create_cypher_from_midi(tmp_path, midi_handler):
+    midi_handler.write_midi_file([64, 60, 62, 60], str(tmp_path / "in.mid"))
+    output = tmp_path / "cypher.txt"
+    midi_handler.create_cypher_from_midi(str(tmp_path / "in.mid"), str(output), workers=1)
+    assert output.read_text(encoding='utf-8') == "A: 60\nB: 62\nC: 64\n"
+
+def test_derive_main_fails_when_no_notes_are_read(tmp_path, capsys):
+    (tmp_path / "bad.mid").write_bytes(b'MThd')
+    cypher = tmp_path / "cypher.txt"
+    cypher.write_text("A: 0\n", encoding='utf-8')
+    output = tmp_path / "derived.txt"
+    assert derive_main([str(tmp_path / "bad.mid"), "-c", str(cypher), "-o", str(output), "-j", "1"]) == 1
+    assert not output.exists()
+    printed = capsys.readouterr().out
+    assert "No notes could be read" in printed
+    assert "Cypher created" not in printed
+
+def test_create_cypher_from_midi_with_multi_character_symbols(tmp_path, midi_handler):
+    midi_handler.alphabet_manager.set_alphabet(["TH", "CH", "A", "E"])
+    midi_handler.write_midi_file([65, 60, 62, 63, 64, 60], str(tmp_path / "in.mid"))
+    output = tmp_path / "cypher.txt"
+    midi_handler.create_cypher_from_midi(str(tmp_path / "in.mid"), str(output), workers=1)
+    assert output.read_text(encoding='utf-8') == "TH: 60\nCH: 62\nA: 63\nE: 64\n"
+
+def test_frequency_mode_ranks_reference_symbols():
+    histogram = [0] * 128
+    histogram[60], histogram[61], histogram[62] = 5, 9, 1
+    alphabet = Alphabet(["TH", "A", "E"])
+    cypher_map = MIDIHandler.derive_cypher_map(histogram, alphabet, "frequency", "the thaw then")
+    assert cypher_map == {"TH": 61, "A": 62, "E": 60}
+
+def test_derive_main_uses_the_cypher_symbols(tmp_path, midi_handler):
+    cypher = tmp_path / "cypher.txt"
+    cypher.write_text("TH: 0\nCH: 1\nA: 2\n", encoding='utf-8')
+    midi_handler.write_midi_file([70, 50, 60, 50], str(tmp_path / "in.mid"))
+    output = tmp_path / "derived.txt"
+    assert derive_main([str(tmp_path / "in.mid"), "-c", str(cypher), "-o", str(output), "-j", "1"]) == 0
+    assert output.read_text(encoding='utf-8') == "TH: 50\nCH: 60\nA: 70\n"
+
+def test_derive_main_fails_without_a_cypher(tmp_path, midi_handler):
+    midi_handler.write_midi_file([60], str(tmp_path / "in.mid"))
+    output = tmp_path / "derived.txt"
+    assert derive_main([str(tmp_path / "in.mid"), "-c", str(tmp_path / "nope.txt"), "-o", str(output)]) == 1
+    assert not output.exists()
@@ -0,0 +1,82 @@
+"""Interrupted and resumed EncryptJobs give the same file as one uninterrupted run."""
+import os
+import random
+import string
+
+import pytest
+
+from de_crypt.jobs import EncryptJob
+
+def _source(tmp_path, seed, text=None):
+    rng = random.Random(seed)
+    if text is None:
+        text = "".join(rng.choice(string.ascii_letters + " .\n") for _ in range(rng.randrange(500, 1500)))
+    source = tmp_path / "source.txt"
+    source.write_text(text, encoding='utf-8')
+    return str(source)
+
+def _interrupt_after(monkeypatch, segments, before_save):
+    """Make EncryptJob.save_state raise KeyboardInterrupt at the given segment."""
+    save_state = EncryptJob.save_state
+
+    def interrupting_save_state(job, state):
+        if before_save and state["segments"] == segments:
+            raise KeyboardInterrupt
+        save_state(job, state)
+        if not before_save and state["segments"] == segments:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(EncryptJob, "save_state", interrupting_save_state)
+
+def _run_with_interruptions(monkeypatch, job, stops, before_save):
+    for stop in stops:
+        with monkeypatch.context() as patch:
+            _interrupt_after(patch, stop, before_save)
+            with pytest.raises(KeyboardInterrupt):
+                job.run()
+        # Stopping before the first checkpoint leaves nothing to resume from
+        assert job.has_checkpoint() or (before_save and stop == 1)
+        assert not os.path.exists(job.target)
+    return job.run()
+
+@pytest.mark.parametrize("keyword", ["", "MELODY"])
+@pytest.mark.parametrize("chord_size", [1, 3])
+@pytest.mark.parametrize("before_save", [False, True], ids=["after_checkpoint", "before_checkpoint"])
+def test_resumed_job_matches_encrypt_text_file(tmp_path, monkeypatch, make_handlers, keyword, chord_size, before_save):
+    _, midi_handler, vigenere_cipher = make_handlers(chord_size=chord_size)
+    for seed in range(3):
+        source = _source(tmp_path, seed)
+        expected_count = midi_handler.encrypt_text_file(source, str(tmp_path / "expected.mid"), vigenere_cipher, keyword)
+        segment_size = random.Random(seed).randrange(20, 120)
+        target = tmp_path / f"job_{seed}.mid"
+        job = EncryptJob(midi_handler, vigenere_cipher, source, str(target), keyword, segment_size)
+        stops = sorted(random.Random(seed).sample(range(1, 5), 2))
+        assert _run_with_interruptions(monkeypatch, job, stops, before_save) == expected_count
+        assert target.read_bytes() == (tmp_path / "expected.mid").read_bytes()
+        assert not job.has_checkpoint()
+        assert not os.path.exists(job.parts_dir)
+
+@pytest.mark.parametrize("keyword", ["", "CHORD"])
+def test_resumed_job_with_multi_character_symbols(tmp_path, monkeypatch, make_handlers, ch_symbols, keyword):
+    _, midi_handler, vigenere_cipher = make_handlers(ch_symbols)
+    text = "".join(random.Random(7).choice(["CH", "A", "B", "H", " ", "E"]) for _ in range(600))
+    source = _source(tmp_path, 7, text)
+    midi_handler.encrypt_text_file(source, str(tmp_path / "expected.mid"), vigenere_cipher, keyword)
+    # An odd segment size cuts CH in two at some segment boundaries
+    job = EncryptJob(midi_handler, vigenere_cipher, source, str(tmp_path / "job.mid"), keyword, 37)
+    _run_with_interruptions(monkeypatch, job, [2, 5], before_save=False)
+    assert (tmp_path / "job.mid").read_bytes() == (tmp_path / "expected.mid").read_bytes()
+
+def test_changed_keyword_refuses_to_resume(tmp_path, monkeypatch, make_handlers):
+    _, midi_handler, vigenere_cipher = make_handlers()
+    source = _source(tmp_path, 1)
+    job = EncryptJob(midi_handler, vigenere_cipher, source, str(tmp_path / "job.mid"), "KEY", 50)
+    _interrupt_after(monkeypatch, 2, before_save=False)
+    with pytest.raises(KeyboardInterrupt):
+        job.run()
+    monkeypatch.undo()
+    changed = EncryptJob(midi_handler, vigenere_cipher, source, str(tmp_path / "job.mid"), "OTHER", 50)
+    with pytest.raises(ValueError, match="different source file, cypher"):
+        changed.run()
+    midi_handler.encrypt_text_file(source, str(tmp_path / "expected.mid"), vigenere_cipher, "OTHER")
+    changed.run(restart=True)
+    assert (tmp_path / "job.mid").read_bytes() == (tmp_path / "expected.mid").read_bytes()
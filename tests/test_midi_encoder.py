@@ -0,0 +1,56 @@
+"""MIDIEncoder output compared with MIDI files saved by mido."""
+import io
+import random
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from de_crypt.midi import MIDIEncoder, mido_notes
+
+def _mido_bytes(notes, note_on_time, note_off_time):
+    # How create_midi_file built its files with mido
+    mid = mido.MidiFile()
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    for note in notes:
+        track.append(mido.Message('note_on', note=note, velocity=32, time=note_on_time))
+        track.append(mido.Message('note_off', note=note, velocity=32, time=note_off_time))
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("seed", range(30))
+def test_encode_matches_mido(seed):
+    rng = random.Random(seed)
+    notes = [rng.randrange(128) for _ in range(rng.choice([0, 1, rng.randrange(2, 3000)]))]
+    note_on_time = rng.choice([0, 1, 127, 128, rng.randrange(1 << 28)])
+    note_off_time = rng.choice([0, 480, 16383, 16384, rng.randrange(1 << 28)])
+    encoder = MIDIEncoder(note_on_time, note_off_time)
+    expected = _mido_bytes(notes, note_on_time, note_off_time)
+    assert bytes(encoder.encode(notes)) == expected
+    assert encoder.size(len(notes)) == len(expected)
+    buffer = bytearray(len(expected) + 5)
+    assert encoder.encode_into(notes, buffer, 5) == len(expected)
+    assert bytes(buffer[5:]) == expected
+
+@pytest.mark.parametrize("chord_size, tracks", [(2, 1), (4, 1), (1, 3), (3, 5)])
+def test_packed_output_reads_back_in_order(chord_size, tracks):
+    rng = random.Random(chord_size * 10 + tracks)
+    for count in (0, 1, chord_size * tracks - 1, 1001):
+        notes = [rng.randrange(128) for _ in range(count)]
+        data = bytes(MIDIEncoder(0, 480, chord_size, tracks).encode(notes))
+        assert mido_notes(file=io.BytesIO(data)) == notes
+
+def test_encode_rejects_out_of_range_notes():
+    with pytest.raises(ValueError):
+        MIDIEncoder().encode([60, 128])
+    with pytest.raises(ValueError):
+        MIDIEncoder(note_on_time=-1)
+
+def test_hold_back_keeps_partial_chords_pending():
+    encoder = MIDIEncoder(chord_size=3)
+    assert encoder.hold_back([], [60, 61, 62, 63]) == ([60, 61, 62], [63])
+    assert encoder.hold_back([63], [64]) == ([], [63, 64])
+    assert encoder.hold_back([63, 64], (65, 66)) == ([63, 64, 65], [66])
+    assert MIDIEncoder().hold_back([], [60, 61]) == ([60, 61], [])
@@ -0,0 +1,36 @@
+"""Tests for the command line options shared by the non-interactive commands."""
+import pytest
+
+from de_crypt.analysis import analyze_main
+from de_crypt.batch import batch_main, generate_main
+from de_crypt.cli import decode_main, encode_main
+from de_crypt.jobs import job_main
+
+@pytest.mark.parametrize("main, argv", [
+    (encode_main, ["TEXT"]),
+    (job_main, ["source.txt"]),
+    (batch_main, ["encrypt", "source.txt"]),
+    (generate_main, ["1", "4"]),
+])
+def test_unknown_replace_needs_replacement(main, argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv + ["--unknown", "replace"])
+    assert exit_info.value.code == 2
+    assert "--unknown replace needs --replacement" in capsys.readouterr().err
+
+@pytest.mark.parametrize("main, argv", [
+    (encode_main, ["TEXT"]),
+    (decode_main, ["in.mid"]),
+    (job_main, ["source.txt"]),
+    (batch_main, ["decrypt", "in.mid"]),
+    (analyze_main, ["in.mid"]),
+])
+def test_invalid_root_note(main, argv, capsys):
+    with pytest.raises(SystemExit):
+        main(argv + ["--root-note", "H4"])
+    assert "invalid root note: H4" in capsys.readouterr().err
+
+def test_job_has_no_tracks_option(capsys):
+    with pytest.raises(SystemExit):
+        job_main(["source.txt", "--tracks", "2"])
+    assert "unrecognized arguments: --tracks" in capsys.readouterr().err
@@ -0,0 +1,67 @@
+"""Tests for the asyncio encrypt/decrypt service."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from de_crypt import service
+from de_crypt.service import CypherServer, service_request
+
+def _serve(cypher_dir, client, **kwargs):
+    """Run client(port, server) against a CypherServer on a free port."""
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            server = CypherServer(executor, str(cypher_dir), **kwargs)
+            listener = await server.start(port=0)
+            try:
+                return await client(listener.sockets[0].getsockname()[1], server)
+            finally:
+                await server.close()
+    return asyncio.run(run())
+
+def test_round_trip(tmp_path, cypher_file):
+    async def client(port, server):
+        request = {"id": 1, "op": "encrypt", "text": "hello world", "keyword": "key", "cypher": cypher_file.name,
+                   "root_note": "C4", "chord_size": 2}
+        encrypted = await service_request(request, port=port)
+        assert encrypted["ok"] and encrypted["id"] == 1 and encrypted["notes"] == 10
+        request = {"id": 2, "op": "decrypt", "midi": encrypted["midi"], "keyword": "KEY", "cypher": cypher_file.name,
+                   "root_note": 60}
+        return await service_request(request, port=port)
+    assert _serve(tmp_path, client) == {"id": 2, "ok": True, "text": "HELLOWORLD", "notes": 10}
+
+def test_cypher_outside_directory_is_refused(tmp_path, cypher_file):
+    (tmp_path / "cyphers").mkdir()
+
+    async def client(port, server):
+        request = {"op": "encrypt", "text": "HELLO", "cypher": "../" + cypher_file.name}
+        return await service_request(request, port=port)
+    response = _serve(tmp_path / "cyphers", client)
+    assert not response["ok"]
+    assert "outside the cypher directory" in response["error"]
+
+def test_busy_server_refuses_requests_and_reports_stats(tmp_path, cypher_file, monkeypatch):
+    release = threading.Event()
+    run_request = service._run_service_request
+
+    def blocking_run_request(*args):
+        release.wait(10)
+        return run_request(*args)
+    monkeypatch.setattr(service, "_run_service_request", blocking_run_request)
+
+    async def client(port, server):
+        request = {"op": "encrypt", "text": "HELLO", "cypher": cypher_file.name}
+        first = asyncio.ensure_future(service_request(request, port=port))
+        while server.pending < 1:
+            await asyncio.sleep(0.01)
+        refused = await service_request(request, port=port)
+        release.set()
+        return await first, refused, await service_request({"op": "stats"}, port=port)
+
+    first, refused, stats = _serve(tmp_path, client, max_inflight=1, max_pending=1)
+    assert first["ok"]
+    assert refused == {"id": None, "ok": False, "error": "RuntimeError: server busy"}
+    assert stats["ok"] and stats["pending"] == 0 and stats["rejected"] == 1
+    assert stats["encrypt"]["count"] == 1 and "p50_ms" in stats["encrypt"]
+    assert stats["decrypt"] == {"count": 0}
+    assert stats["cypher_cache"]["size"] >= 1
+    assert stats["cypher_cache"]["hits"] + stats["cypher_cache"]["misses"] >= 1
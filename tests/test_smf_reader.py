@@ -0,0 +1,96 @@
+"""Parity of SMFNoteReader with mido on the same MIDI files."""
+import io
+import random
+import struct
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from de_crypt.midi import MIDIParseError, SMFNoteReader, mido_notes
+
+def _random_message(rng, channel):
+    kind = rng.randrange(10)
+    if kind < 4:
+        # Some note_ons have velocity 0 and act as note_off
+        return mido.Message('note_on', channel=channel, note=rng.randrange(128),
+                            velocity=rng.choice([0, rng.randrange(1, 128)]))
+    if kind == 4:
+        return mido.Message('note_off', channel=channel, note=rng.randrange(128), velocity=rng.randrange(128))
+    if kind == 5:
+        return mido.Message('program_change', channel=channel, program=rng.randrange(128))
+    if kind == 6:
+        return mido.Message('pitchwheel', channel=channel, pitch=rng.randrange(-8192, 8192))
+    if kind == 7:
+        return rng.choice([
+            mido.Message('control_change', channel=channel, control=rng.randrange(128), value=rng.randrange(128)),
+            mido.Message('aftertouch', channel=channel, value=rng.randrange(128)),
+            mido.Message('polytouch', channel=channel, note=rng.randrange(128), value=rng.randrange(128)),
+        ])
+    if kind == 8:
+        return mido.Message('sysex', data=[rng.randrange(128) for _ in range(rng.randrange(0, 300))])
+    return rng.choice([
+        mido.MetaMessage('text', text='x' * rng.randrange(0, 200)),
+        mido.MetaMessage('set_tempo', tempo=rng.randrange(1, 1 << 24)),
+        mido.MetaMessage('track_name', name='track'),
+    ])
+
+def _random_midi_file(seed):
+    rng = random.Random(seed)
+    mid = mido.MidiFile(type=1)
+    for _ in range(rng.randrange(1, 5)):
+        track = mido.MidiTrack()
+        channels = rng.sample(range(16), rng.randrange(1, 4))
+        for _ in range(rng.randrange(0, 200)):
+            message = _random_message(rng, rng.choice(channels))
+            # Long runs on one channel are written with running status
+            message.time = rng.choice([0, 0, rng.randrange(1 << 21)])
+            track.append(message)
+        mid.tracks.append(track)
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_mido_on_random_files(seed, tmp_path, midi_handler):
+    data = _random_midi_file(seed)
+    path = tmp_path / "random.mid"
+    path.write_bytes(data)
+    expected = mido_notes(str(path))
+    assert list(SMFNoteReader.iter_notes(str(path))) == expected
+    assert list(SMFNoteReader.iter_notes(str(path), release=True)) == expected
+    assert list(SMFNoteReader.iter_bytes_notes(data)) == expected
+    assert midi_handler.read_midi_notes(str(path)) == expected
+    assert midi_handler.read_midi_notes(str(path), native=False) == expected
+
+def _track(events):
+    return b'MTrk' + struct.pack('>I', len(events)) + events
+
+def test_running_status_meta_and_sysex(tmp_path, midi_handler):
+    events = (
+        b'\x00\x90\x3c\x40'          # note_on 60
+        b'\x00\x3e\x40'              # running status note_on 62
+        b'\x00\x3c\x00'              # running status note_on velocity 0
+        b'\x00\xff\x01\x03abc'       # text meta event
+        b'\x81\x00\x91\x40\x7f'      # note_on 64, channel 1, two-byte delta
+        b'\x00\xf0\x03\x01\x02\xf7'  # sysex
+        b'\x00\xc1\x05'              # program_change
+        b'\x00\xe1\x00\x40'          # pitchwheel
+        b'\x00\x81\x40\x00'          # note_off 64
+        b'\x00\x91\x43\x10'          # note_on 67
+        b'\x00\xff\x2f\x00'
+    )
+    second = b'\x00\x92\x30\x01\x00\x31\x00\x00\x32\x7f\x00\xff\x2f\x00'
+    data = b'MThd' + struct.pack('>IHHH', 6, 1, 2, 480) + _track(events) + _track(second)
+    path = tmp_path / "handmade.mid"
+    path.write_bytes(data)
+    assert list(SMFNoteReader.iter_notes(str(path))) == [60, 62, 64, 67, 48, 50]
+    assert mido_notes(str(path)) == [60, 62, 64, 67, 48, 50]
+    assert midi_handler.read_midi_notes(str(path), native=False) == [60, 62, 64, 67, 48, 50]
+
+def test_truncated_file_raises(tmp_path):
+    data = _random_midi_file(1)
+    with pytest.raises(MIDIParseError):
+        list(SMFNoteReader.iter_bytes_notes(data[:len(data) // 2]))
+    with pytest.raises(MIDIParseError):
+        list(SMFNoteReader.iter_bytes_notes(b'RIFF' + data[4:]))
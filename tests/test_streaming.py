@@ -0,0 +1,47 @@
+"""Streaming text-to-MIDI encryption gives the same file as the in-memory path."""
+import random
+import string
+
+import pytest
+
+def _text(seed, extra=""):
+    rng = random.Random(seed)
+    return "".join(rng.choice(string.ascii_letters + "  .,\n" + extra) for _ in range(rng.randrange(200, 2000)))
+
+def _reference_file(tmp_path, midi_handler, vigenere_cipher, cypher_handler, text, keyword):
+    if keyword:
+        text = vigenere_cipher.encrypt(text, keyword)
+    midi_handler.create_midi_file(midi_handler.text_to_midi_notes(text, cypher_handler.scale), "reference")
+    return (tmp_path / "reference.mid").read_bytes()
+
+@pytest.mark.parametrize("keyword", ["", "MELODY"])
+@pytest.mark.parametrize("extra", ["", "éß\r"], ids=["ascii", "unicode"])
+@pytest.mark.parametrize("chord_size, tracks", [(1, 1), (3, 1), (2, 3)])
+def test_encrypt_text_file_matches_create_midi_file(tmp_path, monkeypatch, make_handlers, keyword, extra, chord_size,
+                                                    tracks):
+    monkeypatch.chdir(tmp_path)
+    cypher_handler, midi_handler, vigenere_cipher = make_handlers(chord_size=chord_size, tracks=tracks)
+    for seed in range(3):
+        text = _text(seed, extra)
+        source = tmp_path / "source.txt"
+        source.write_text(text, encoding='utf-8', newline='')
+        with open(source, 'r') as file:
+            expected = _reference_file(tmp_path, midi_handler, vigenere_cipher, cypher_handler, file.read(), keyword)
+        for chunk_size in (1, 7, 64, 1000, None):
+            count = midi_handler.encrypt_text_file(str(source), "streamed.mid", vigenere_cipher, keyword, chunk_size)
+            assert (tmp_path / "streamed.mid").read_bytes() == expected, (seed, chunk_size)
+            assert count == len(midi_handler.read_midi_notes("streamed.mid"))
+        (tmp_path / "reference.mid").unlink()
+
+@pytest.mark.parametrize("keyword", ["", "CHORD"])
+def test_encrypt_text_file_with_multi_character_symbols(tmp_path, monkeypatch, make_handlers, ch_symbols, keyword):
+    monkeypatch.chdir(tmp_path)
+    cypher_handler, midi_handler, vigenere_cipher = make_handlers(ch_symbols)
+    text = _text(5).replace("c", "ch").replace("C", "CH")
+    source = tmp_path / "source.txt"
+    source.write_text(text, encoding='utf-8', newline='')
+    with open(source, 'r') as file:
+        expected = _reference_file(tmp_path, midi_handler, vigenere_cipher, cypher_handler, file.read(), keyword)
+    for chunk_size in (1, 2, 5, 64, None):
+        midi_handler.encrypt_text_file(str(source), "streamed.mid", vigenere_cipher, keyword, chunk_size)
+        assert (tmp_path / "streamed.mid").read_bytes() == expected, chunk_size
@@ -0,0 +1,74 @@
+"""Tests for the Vigenere cypher."""
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from de_crypt.cypher import AlphabetManager
+from de_crypt.vigenere import ParallelVigenere, VigenereCipher, VigenereTable
+
+def test_square_lookup():
+    # Row k, column p of the square, worked out by hand; '?' is not in the alphabet
+    cipher = VigenereCipher(AlphabetManager("ABC"))
+    assert cipher.vigenere_square == ["ABC", "BCA", "CAB"]
+    assert cipher.encrypt("abc abc?", "b") == "BCABCA?"
+    assert cipher.decrypt("BCABCA?", "B") == "ABCABC?"
+
+def test_matches_baseline_cipher():
+    cipher = VigenereCipher(AlphabetManager())
+    assert cipher.encrypt("Attack at dawn!", "LEMON") == "LX6OPVE6RN8R!"
+    assert cipher.encrypt("meet-me 9pm, gate 7", "key") == "WI34-AOCDW,5KX3G"
+    assert cipher.decrypt("WI34-AOCDW,5KX3G", "KEY") == "MEET-ME9PM,GATE7"
+    # The key carries on from offset, so the tail encrypts as it does in the whole text
+    assert cipher.encrypt("dawn!", "LEMON", offset=8) == "RN8R!"
+    assert VigenereTable(cipher.alphabet).transform("RN8R!", "LEMON", True, 8) == "DAWN!"
+
+@pytest.fixture(scope="module")
+def parallel():
+    with ParallelVigenere(2, min_size=0) as parallel:
+        # Small chunks so every call is split across both workers
+        parallel.MIN_CHUNK = 64
+        yield parallel
+
+@pytest.mark.parametrize("alphabet", ["ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", "ΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩ"],
+                         ids=["latin-1", "utf-32"])
+def test_parallel_matches_table(parallel, alphabet):
+    table = VigenereTable(alphabet)
+    rng = random.Random(alphabet)
+    for _ in range(5):
+        # Characters outside the alphabet are left as they are
+        text = "".join(rng.choice(alphabet + ".!é") for _ in range(rng.randrange(1, 2000)))
+        keyword = "".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 12)))
+        offset = rng.randrange(50)
+        for decrypt in (False, True):
+            assert parallel.transform(table, text, keyword, decrypt, offset) == \
+                table.transform(text, keyword, decrypt, offset)
+
+def test_parallel_reports_keyword_errors(parallel):
+    table = VigenereTable("ABC")
+    with pytest.raises(ValueError, match="not in the alphabet"):
+        parallel.transform(table, "ABC" * 100, "AZ")
+
+@pytest.mark.parametrize("method", ["spawn", "forkserver"])
+def test_parallel_leaves_no_shared_memory_warnings(method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} is not available")
+    script = textwrap.dedent(f"""
+        import multiprocessing
+        from de_crypt.vigenere import ParallelVigenere, VigenereTable
+        if __name__ == "__main__":
+            multiprocessing.set_start_method({method!r})
+            table = VigenereTable("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+            with ParallelVigenere(2, min_size=0) as parallel:
+                for _ in range(4):
+                    assert parallel.transform(table, "HELLOWORLD" * 20000, "KEY") == \\
+                        table.transform("HELLOWORLD" * 20000, "KEY")
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ""